@@ -1,12 +1,24 @@
 # test_adapter_pattern.py
+import asyncio
+import gc
+import json
+import os
+import tempfile
 import unittest
+import weakref
+from unittest import mock
 
 from AdapterPattern.bibliotheque_spatiale import BibliothequeSpatiale
+from AdapterPattern.book_index import BookIndex
 from AdapterPattern.intergalactic_mission_service import IntergalacticMissionService
 from AdapterPattern.member_pilote import MembrePilote
+from AdapterPattern.mission_engine import MissionEngine, TimerWheel
+from AdapterPattern.registry import Registry
 from AdapterPattern.spaceship_adapter import SpaceshipAdapter
+from AdapterPattern.unit_of_work import UnitOfWork
 from Bibliotheque.adresse import Adresse
 from Bibliotheque.livre import Livre
+from ObserverPattern.spaceship import Spaceship as DeliverySpaceship
 from SpaceShip.spaceship_model import Spaceship
 
 
@@ -44,6 +56,85 @@ class AdapterPatternTest(unittest.TestCase):
         self.assertIsNone(adapter.emprunteur)
         self.assertTrue(adapter.est_disponible())
 
+    def test_spaceship_identifiers(self):
+        """Test that spaceship identifiers are stable and unique"""
+        registry = Registry()
+        adapter = SpaceshipAdapter(self.enterprise, registry=registry)
+        self.assertRegex(adapter.isbn, r"^SHIP-[0-9A-F]{12}$")
+        self.assertEqual(SpaceshipAdapter(self.enterprise, registry=registry).isbn, adapter.isbn)
+        self.assertEqual(SpaceshipAdapter(Spaceship("Enterprise", 10), registry=Registry()).isbn, adapter.isbn)
+
+        # The name alone makes the identifier, whatever was registered before or collected since
+        self.assertEqual(SpaceshipAdapter(Spaceship("Enterprise", 10), registry=registry).isbn, adapter.isbn)
+        self.assertNotEqual(SpaceshipAdapter(Spaceship("Enterprise-2", 10), registry=registry).isbn, adapter.isbn)
+
+    def test_pilot_reuse_and_adapter_reuse_within_a_fleet(self):
+        """Test that loans reuse the member's pilot, and a fleet reuses its adapter for the same ship only"""
+        registry = Registry()
+        biblio = BibliothequeSpatiale("Annexe", registry=registry)
+        voyager = Spaceship("Voyager", 100)
+        biblio.add_spaceship(voyager)
+        adapter = biblio.get_spaceship("Voyager")
+        biblio.add_spaceship(voyager)
+        self.assertIs(biblio.get_spaceship("Voyager"), adapter)
+
+        # A namesake replaces the ship and its adapter; the original then gets a new adapter again
+        namesake = Spaceship("Voyager", 50)
+        biblio.add_spaceship(namesake)
+        self.assertIs(biblio.get_spaceship("Voyager").spaceship, namesake)
+        biblio.add_spaceship(voyager)
+        self.assertIsNot(biblio.get_spaceship("Voyager"), adapter)
+        adapter = biblio.get_spaceship("Voyager")
+
+        # Another library lends the same ship through its own adapter
+        annexe = BibliothequeSpatiale("Seconde annexe")
+        annexe.add_spaceship(voyager)
+        self.assertIsNot(annexe.get_spaceship("Voyager"), adapter)
+
+        biblio.borrow_spaceship("Voyager", self.jean_luc)
+        pilot = voyager.pilot
+        self.assertEqual(pilot.name, "Jean-Luc Picard")
+        biblio.return_spaceship("Voyager", self.jean_luc)
+        self.assertIsNone(pilot.spaceship)
+        biblio.borrow_spaceship("Voyager", self.jean_luc)
+        self.assertIs(voyager.pilot, pilot)
+        self.assertIsNone(annexe.get_spaceship("Voyager").emprunteur)
+        biblio.return_spaceship("Voyager", self.jean_luc)
+
+        adapter = weakref.ref(adapter)
+        del biblio, annexe, voyager, namesake, pilot
+        gc.collect()
+        self.assertIsNone(adapter())
+
+    def test_returning_one_ship_keeps_the_pilot_on_another(self):
+        """Test that returning a ship does not unlink the shared pilot from the other ship it flies"""
+        self.biblio_spatiale.borrow_spaceship("Enterprise", self.jean_luc)
+        self.biblio_spatiale.borrow_spaceship("Millennium Falcon", self.jean_luc)
+        pilot = self.millennium.pilot
+        self.assertIs(self.enterprise.pilot, pilot)
+
+        self.biblio_spatiale.return_spaceship("Enterprise", self.jean_luc)
+        self.assertIsNone(self.enterprise.pilot)
+        self.assertIs(self.millennium.pilot, pilot)
+        self.assertIs(pilot.spaceship, self.millennium)
+        self.assertIn("Millennium Falcon", pilot.launch_mission(10))
+
+    def test_discarded_adapters_stop_listening(self):
+        """Test that a ship does not keep notifying adapters nobody uses any more"""
+        voyager = Spaceship("Voyager", 100)
+        notified = []
+        for _ in range(3):
+            SpaceshipAdapter(voyager, registry=Registry()).add_availability_listener(notified.append)
+        gc.collect()
+        voyager.fuel_level = 50
+        self.assertEqual(notified, [])
+        self.assertEqual(voyager._fuel_listeners, ())
+
+        adapter = SpaceshipAdapter(voyager, registry=Registry())
+        adapter.add_availability_listener(notified.append)
+        voyager.fuel_level = 40
+        self.assertEqual(notified, [adapter])
+
     def test_successful_mission_preparation(self):
         """Test if a mission can be successfully prepared"""
         mission_id = self.mission_service.prepare_mission(
@@ -105,7 +196,8 @@ class AdapterPatternTest(unittest.TestCase):
         result = self.mission_service.complete_mission(mission_id)
 
         self.assertTrue(result)
-        self.assertEqual(self.mission_service.active_missions[mission_id]["status"], "Completed")
+        self.assertEqual(self.mission_service.get_mission(mission_id)["status"], "Completed")
+        self.assertNotIn(mission_id, self.mission_service.active_missions)
 
         # Check if resources are returned
         enterprise_adapter = self.biblio_spatiale.get_spaceship("Enterprise")
@@ -114,6 +206,254 @@ class AdapterPatternTest(unittest.TestCase):
         self.assertEqual(self.livre_python.statut, "Disponible")
         self.assertEqual(self.livre_space.statut, "Disponible")
 
+    def test_mission_indexes_and_history(self):
+        """Test mission queries by status, pilot and ship, and the bounded history"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "missions.jsonl")
+            service = IntergalacticMissionService(self.biblio_spatiale, history_size=1, history_path=path)
+            first = service.prepare_mission("Enterprise", self.jean_luc, "Vega", [self.livre_python])
+            second = service.prepare_mission("Millennium Falcon", self.jean_luc, "Mars", [self.livre_space])
+            service.launch_mission(first)
+
+            in_progress = service.get_missions(status="In Progress", pilot=self.jean_luc)
+            self.assertEqual([mission["id"] for mission in in_progress], [first])
+            self.assertEqual([mission["id"] for mission in service.get_missions(pilot=self.jean_luc)],
+                             [first, second])
+            self.assertEqual(service.get_missions(status="Preparing", spaceship_name="Enterprise"), [])
+
+            service.complete_mission(first)
+            service.launch_mission(second)
+            service.complete_mission(second)
+            self.assertEqual(service.active_missions, {})
+            self.assertEqual(service.get_missions(pilot=self.jean_luc), [])
+            self.assertIsNone(service.get_mission(first))  # evicted from the bounded history
+            self.assertEqual(service.get_mission(second)["status"], "Completed")
+
+            with open(path, encoding="utf-8") as history:
+                records = [json.loads(line) for line in history]
+            self.assertEqual([(record["id"], record["spaceship"], record["status"]) for record in records],
+                             [(first, "Enterprise", "Completed"), (second, "Millennium Falcon", "Completed")])
+
+    def test_failed_launch_returns_resources(self):
+        """Test that a launch failing for lack of fuel gives the ship and the books back"""
+        self.enterprise.fuel_level = 5
+        mission_id = self.mission_service.prepare_mission("Enterprise", self.jean_luc, "Vega", [self.livre_python])
+        self.assertFalse(self.mission_service.launch_mission(mission_id))
+
+        self.assertEqual(self.mission_service.get_mission(mission_id)["status"], "Failed - Insufficient Fuel")
+        self.assertEqual(self.mission_service.get_missions(spaceship_name="Enterprise"), [])
+        self.assertTrue(self.biblio_spatiale.get_spaceship("Enterprise").est_disponible())
+        self.assertTrue(self.livre_python.est_disponible())
+        self.assertIsNotNone(self.mission_service.prepare_mission("Enterprise", self.jean_luc, "Mars",
+                                                                  [self.livre_python]))
+
+    def test_mission_with_observer_pattern_spaceship(self):
+        """Test that a spaceship from the ObserverPattern model can join the fleet and fly a mission"""
+        voyager = DeliverySpaceship("Voyager", 100)
+        self.biblio_spatiale.add_spaceship(voyager)
+        self.assertIn(self.biblio_spatiale.get_spaceship("Voyager"), self.biblio_spatiale.list_available_spaceships())
+
+        mission_id = self.mission_service.prepare_mission("Voyager", self.jean_luc, "Vega", [self.livre_python])
+        self.assertTrue(self.mission_service.launch_mission(mission_id))
+        self.assertEqual(voyager.fuel_level, 100 - 19)
+        self.assertTrue(self.mission_service.complete_mission(mission_id))
+        self.assertTrue(self.biblio_spatiale.get_spaceship("Voyager").est_disponible())
+
+        voyager.fuel_level = 0
+        adapter = self.biblio_spatiale.get_spaceship("Voyager")
+        self.assertNotIn(adapter, self.biblio_spatiale.list_available_spaceships())
+
+    def test_timer_wheel(self):
+        """Test that timers expire at their tick, including those more than one turn ahead"""
+        wheel = TimerWheel(slots=4)
+        for tick, name in ((6, "late"), (2, "early"), (3, "middle")):
+            wheel.schedule(tick, name)
+        self.assertEqual(wheel.advance(1), [])
+        self.assertEqual(wheel.advance(3), ["early", "middle"])
+        self.assertEqual(wheel.advance(5), [])
+        self.assertEqual(len(wheel), 1)
+        self.assertEqual(wheel.advance(20), ["late"])
+
+    def test_mission_engine(self):
+        """Test that the engine completes missions once their travel time has elapsed"""
+        engine = MissionEngine(self.mission_service, seconds_per_hour=0.02, tick=0.001)
+        vega = self.mission_service.prepare_mission("Enterprise", self.jean_luc, "Vega", [self.livre_python])
+        andromeda = self.mission_service.prepare_mission("Millennium Falcon", self.jean_luc, "Andromeda", [])
+        completed = []
+
+        async def run():
+            futures = [engine.start_mission(vega), engine.start_mission(andromeda)]
+            for future, mission_id in zip(futures, (vega, andromeda)):
+                future.add_done_callback(lambda _, mission_id=mission_id: completed.append(mission_id))
+            self.assertEqual(engine.in_flight(), 2)
+            return await asyncio.gather(*futures)
+
+        self.assertEqual(asyncio.run(run()), [True, True])
+        self.assertEqual(completed, [vega, andromeda])
+        self.assertEqual(self.mission_service.get_mission(andromeda)["status"], "Completed")
+        self.assertTrue(self.livre_python.est_disponible())
+        self.assertEqual(engine.in_flight(), 0)
+
+    def test_mission_engine_failures(self):
+        """Test that a failing completion or a cancelled engine leaves no future pending"""
+        engine = MissionEngine(self.mission_service, seconds_per_hour=0.01, tick=0.001)
+        vega = self.mission_service.prepare_mission("Enterprise", self.jean_luc, "Vega", [])
+        mars = self.mission_service.prepare_mission("Millennium Falcon", self.jean_luc, "Mars", [])
+        complete_mission = self.mission_service.complete_mission
+
+        def complete_or_fail(mission_id):
+            if mission_id == vega:
+                raise RuntimeError("docking failure")
+            return complete_mission(mission_id)
+
+        async def run():
+            # Both destinations have four letters: the missions last as long and complete in the same tick
+            with mock.patch.object(self.mission_service, "complete_mission", side_effect=complete_or_fail):
+                return await asyncio.gather(engine.start_mission(vega), engine.start_mission(mars),
+                                            return_exceptions=True)
+
+        failed, completed = asyncio.run(run())
+        self.assertIsInstance(failed, RuntimeError)
+        self.assertTrue(completed)
+        self.assertEqual(engine.in_flight(), 0)
+
+        async def abandon():
+            # Returning while a mission is in flight: asyncio.run cancels the driver
+            return engine.start_mission(self.mission_service.prepare_mission("Millennium Falcon", self.jean_luc,
+                                                                              "Andromeda", []))
+
+        future = asyncio.run(abandon())
+        self.assertTrue(future.cancelled())
+        self.assertEqual(engine.in_flight(), 0)
+
+    def test_failed_preparation_rolls_back(self):
+        """Test that a book taken during preparation releases the ship and the books already borrowed"""
+
+        class ContestedBook(Livre):
+            """A book checked out by someone else between the availability check and the loan"""
+            __slots__ = ()
+
+            def emprunter(self, membre):
+                raise ValueError(f"Le livre {self.titre} n'est pas disponible")
+
+        contested = ContestedBook("Contested Atlas", "978-0-00-000000-0")
+        self.enterprise.fuel_level = 60
+        mission_id = self.mission_service.prepare_mission(
+            "Enterprise", self.jean_luc, "Alpha Centauri", [self.livre_python, contested])
+
+        self.assertIsNone(mission_id)
+        self.assertEqual(self.mission_service.last_error, "Livre Contested Atlas non disponible")
+        self.assertEqual(self.mission_service.active_missions, {})
+        enterprise = self.biblio_spatiale.get_spaceship("Enterprise")
+        self.assertTrue(enterprise.est_disponible())
+        self.assertIsNone(enterprise.emprunteur)
+        self.assertIsNone(self.enterprise.pilot)
+        self.assertEqual(self.enterprise.fuel_level, 60)  # not refuelled as a return would
+        self.assertIn(enterprise, self.biblio_spatiale.list_available_spaceships())
+        self.assertTrue(self.livre_python.est_disponible())
+        self.assertEqual(list(self.jean_luc.emprunts), [])
+
+    def test_rolled_back_borrow_keeps_the_pilot_on_its_ship(self):
+        """Test that rolling back a ship loan gives the shared pilot back its previous ship"""
+        self.biblio_spatiale.borrow_spaceship("Millennium Falcon", self.jean_luc)
+        pilot = self.millennium.pilot
+
+        with UnitOfWork() as work:
+            self.assertTrue(work.borrow_spaceship(self.biblio_spatiale, "Enterprise", self.jean_luc))
+            self.assertIs(pilot.spaceship, self.enterprise)
+            work.rollback()
+
+        self.assertIsNone(self.enterprise.pilot)
+        self.assertIs(pilot.spaceship, self.millennium)
+        self.assertIs(self.millennium.pilot, pilot)
+        self.assertTrue(self.biblio_spatiale.get_spaceship("Enterprise").est_disponible())
+        self.assertEqual(list(self.jean_luc.emprunts), [self.biblio_spatiale.get_spaceship("Millennium Falcon")])
+
+    def test_plan_missions(self):
+        """Test that the planner matches requests with ships and qualified pilots by best fit"""
+        serenity = Spaceship("Serenity", 30)
+        self.biblio_spatiale.add_spaceship(serenity)
+        kaylee = MembrePilote("Kaylee Frye", "P22222")
+        kaylee.qualification_level = 2
+        livre_warp = Livre("Physics of Warp Drive", "978-0-553-57548-0")
+
+        mission_ids = self.mission_service.plan_missions(
+            [("Mars", [livre_warp]),                                    # 19 fuel units
+             ("Alpha Centauri", [self.livre_python, self.livre_space]),  # 34 fuel units
+             ("Vega", [self.livre_python]),                              # already requested
+             ("Andromeda", [])],                                         # no pilot left
+            [kaylee, self.jean_luc])
+
+        self.assertIsNone(mission_ids[2])
+        self.assertIsNone(mission_ids[3])
+        missions = self.mission_service.active_missions
+        self.assertIs(missions[mission_ids[0]]["spaceship"].spaceship, serenity)
+        self.assertIs(missions[mission_ids[0]]["pilot"], kaylee)
+        self.assertIs(missions[mission_ids[1]]["spaceship"].spaceship, self.enterprise)
+        self.assertIs(missions[mission_ids[1]]["pilot"], self.jean_luc)
+        self.assertTrue(self.mission_service.launch_mission(mission_ids[1]))
+
+    def test_available_spaceships_index(self):
+        """Test that the availability index follows loans, returns and fuel changes"""
+        voyager = Spaceship("Voyager", 120)
+        self.biblio_spatiale.add_spaceship(voyager)
+        self.assertEqual([ship.spaceship for ship in self.biblio_spatiale.top_available_spaceships(2)],
+                         [self.millennium, voyager])
+
+        self.biblio_spatiale.borrow_spaceship("Millennium Falcon", self.jean_luc)
+        self.enterprise.fuel_level = 0
+        voyager.fuel_level = 90
+        self.assertEqual([ship.spaceship for ship in self.biblio_spatiale.list_available_spaceships()], [voyager])
+        self.assertEqual([ship.spaceship for ship in self.biblio_spatiale.top_available_spaceships(3)], [voyager])
+
+        self.millennium.fuel_level = 10
+        self.biblio_spatiale.return_spaceship("Millennium Falcon", self.jean_luc)
+        self.enterprise.fuel_level = 95
+        self.assertEqual([ship.spaceship for ship in self.biblio_spatiale.top_available_spaceships(3)],
+                         [self.millennium, self.enterprise, voyager])
+
+    def test_book_search(self):
+        """Test exact, accent-insensitive, substring and prefix book searches"""
+        etoiles = Livre("Les Étoiles  filantes", "978-2-07-036822-8")
+        self.biblio_spatiale.add_book(etoiles)
+        self.assertEqual(self.biblio_spatiale.nombre_de_livres, 5003)
+
+        self.assertIs(self.biblio_spatiale.find_book_by_title("Python Programming"), self.livre_python)
+        self.assertIsNone(self.biblio_spatiale.find_book_by_title("python programming"))
+        self.assertEqual(self.biblio_spatiale.find_books_by_title("les etoiles filantes"), [etoiles])
+        self.assertEqual(self.biblio_spatiale.search_books("TOILES"), [etoiles])
+        self.assertEqual(self.biblio_spatiale.search_books("ra"), [self.livre_python, self.livre_space])
+        self.assertEqual(self.biblio_spatiale.search_books("Travel", limit=1), [self.livre_space])
+        self.assertEqual(self.biblio_spatiale.search_books_by_prefix("p"), [self.livre_python])
+
+        self.assertTrue(self.biblio_spatiale.remove_book(etoiles.isbn))
+        self.assertFalse(self.biblio_spatiale.remove_book(etoiles.isbn))
+        self.assertEqual(self.biblio_spatiale.nombre_de_livres, 5002)
+        self.assertEqual(self.biblio_spatiale.search_books("etoiles"), [])
+        self.assertEqual(self.biblio_spatiale.search_books_by_prefix("les"), [])
+        self.assertIsNone(self.biblio_spatiale.get_book(etoiles.isbn))
+
+    def test_book_index_compaction(self):
+        """Test that removing and re-adding books does not grow the index"""
+        index = BookIndex()
+        books = [Livre(f"Guide {n}", f"978-{n}") for n in range(10)]
+        for book in books:
+            index.add(book)
+        for _ in range(100):
+            index.remove(books[3].isbn)
+            index.add(books[3])
+            index.add(books[5])  # replaces the book with the same ISBN
+
+        self.assertLessEqual(len(index._books), 2 * len(index) + 1)
+        self.assertEqual(len(index), 10)
+        # Re-added books come last, in the order they were re-added
+        expected = books[:3] + books[4:5] + books[6:] + [books[3], books[5]]
+        self.assertEqual(index.search("guide"), expected)
+        self.assertEqual(index.search("gu"), expected)
+        self.assertEqual(index.search("guide 3"), [books[3]])
+        self.assertEqual(index.search_prefix("guide 5"), [books[5]])
+        self.assertEqual(index.find_all_by_title("GUIDE 3"), [books[3]])
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,199 @@
+# benchmark.py
+"""
+Performance measurements for the AdapterPattern module.
+
+Run with: python -m AdapterPattern.benchmark
+"""
+import asyncio
+import random
+import statistics
+import time
+
+from AdapterPattern.bibliotheque_spatiale import BibliothequeSpatiale
+from AdapterPattern.intergalactic_mission_service import IntergalacticMissionService, _fuel_needed
+from AdapterPattern.member_pilote import MembrePilote
+from AdapterPattern.mission_engine import MissionEngine
+from Bibliotheque.livre import Livre
+from SpaceShip.spaceship_model import Spaceship
+
+_WORDS = ["space", "étoile", "galaxy", "voyage", "python", "quantum", "nébuleuse", "orbit", "comet",
+          "planète", "station", "warp", "drive", "histoire", "science", "atlas", "guide", "manuel"]
+
+
+def _timer(function, *args):
+    """Run a function and return the elapsed time in seconds"""
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def _titles(count, seed=0):
+    """Random titles of three to five words, numbered to keep them distinct"""
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(_WORDS, k=rng.randint(3, 5))).capitalize() + f" {i}" for i in range(count)]
+
+
+def bench_book_search(count=1_000_000, queries=200):
+    """Compare the book index with a linear scan over `count` titles"""
+    titles = _titles(count)
+    books = [Livre(title, f"978-{i:09d}") for i, title in enumerate(titles)]
+    library = BibliothequeSpatiale("Benchmark")
+
+    def add_all():
+        for book in books:
+            library.add_book(book)
+
+    print(f"Book search over {count:,} titles:")
+    print(f"  {'indexing':24s}: {_timer(add_all):8.2f} s")
+
+    rng = random.Random(1)
+    wanted = [rng.choice(titles) for _ in range(queries)]
+
+    def linear_scan():
+        for title in wanted:
+            next(book for book in books if book.titre == title)
+
+    def exact():
+        for title in wanted:
+            library.find_book_by_title(title)
+
+    def normalized():
+        for title in wanted:
+            library.find_books_by_title(title.upper())
+
+    def substring():
+        for title in wanted:
+            library.search_books(" ".join(title.split()[-2:]), limit=10)
+
+    def prefix():
+        for title in wanted:
+            library.search_books_by_prefix(title[:12], limit=10)
+
+    library.search_books_by_prefix("", limit=1)  # sorts the prefix list once, after indexing
+    for label, function in (("linear scan, exact title", linear_scan), ("exact title", exact),
+                            ("normalized title", normalized), ("substring, 10 results", substring),
+                            ("prefix, 10 results", prefix)):
+        print(f"  {label:24s}: {_timer(function) / queries * 1e6:10,.1f} µs/query")
+
+
+def bench_available_spaceships(count=100_000, polls=1_000, k=10):
+    """Compare polling the available ships by scanning the fleet and through the availability index"""
+    rng = random.Random(0)
+    library = BibliothequeSpatiale("Benchmark")
+    ships = [Spaceship(f"Ship {i}", rng.randint(0, 200)) for i in range(count)]
+    for ship in ships:
+        library.add_spaceship(ship)
+
+    def scan():
+        for _ in range(polls // 100):
+            available = [adapter for adapter in library._spaceship_fleet.values() if adapter.est_disponible()]
+            sorted(available, key=lambda adapter: adapter.spaceship.fuel_level, reverse=True)[:k]
+
+    def index():
+        for _ in range(polls):
+            # Each poll follows a fuel change, as in a dispatch loop
+            rng.choice(ships).fuel_level = rng.randint(0, 200)
+            library.top_available_spaceships(k)
+
+    print(f"Top {k} available ships by fuel, fleet of {count:,}:")
+    print(f"  {'scan and sort':16s}: {_timer(scan) / (polls // 100) * 1e6:10,.1f} µs/poll")
+    print(f"  {'index':16s}: {_timer(index) / polls * 1e6:10,.1f} µs/poll")
+
+
+def _mission_setup(count, seed=0):
+    """A library with `count` ships, `count` pilots and `count` mission requests"""
+    rng = random.Random(seed)
+    library = BibliothequeSpatiale("Benchmark")
+    for i in range(count):
+        library.add_spaceship(Spaceship(f"Ship {i}", rng.randint(10, 80)))
+    pilots = []
+    for i in range(count):
+        pilot = MembrePilote(f"Pilot {i}", f"P{i:05d}")
+        pilot.qualification_level = rng.randint(2, 5)
+        pilots.append(pilot)
+    requests = [(rng.choice(["Mars", "Vega", "Alpha Centauri", "Andromeda"]) * rng.randint(1, 3),
+                 [Livre(f"Book {i}-{j}", f"978-{i:06d}-{j}") for j in range(rng.randint(0, 4))])
+                for i in range(count)]
+    return IntergalacticMissionService(library), pilots, requests
+
+
+def bench_plan_missions(count=5_000):
+    """Compare the batch planner with a caller picking a ship and a pilot before each prepare_mission"""
+
+    def sequential(service, pilots, requests):
+        free_pilots = list(pilots)
+        for destination, books in requests:
+            fuel = _fuel_needed(destination, len(books))
+            # First available ship with enough fuel that a free pilot can fly
+            for adapter in service.bibliotheque.list_available_spaceships():
+                if adapter.spaceship.fuel_level < fuel:
+                    continue
+                pilot = next((pilot for pilot in free_pilots if pilot.can_pilot(adapter)), None)
+                if pilot is not None:
+                    service.prepare_mission(adapter.spaceship.name, pilot, destination, books)
+                    free_pilots.remove(pilot)
+                    break
+
+    def planned(service, pilots, requests):
+        service.plan_missions(requests, pilots)
+
+    print(f"Preparing {count:,} missions with {count:,} ships and pilots:")
+    for label, function in (("sequential", sequential), ("plan_missions", planned)):
+        service, pilots, requests = _mission_setup(count)
+        duration = _timer(function, service, pilots, requests)
+        print(f"  {label:16s}: {duration * 1000:8.1f} ms, {len(service.active_missions):,} missions")
+
+
+def bench_mission_engine(count=20_000, seconds_per_hour=0.5, tick=0.01, probe=0.005):
+    """Run `count` missions on the engine and measure event loop lag and completion lateness"""
+    service, pilots, requests = _mission_setup(count)
+    mission_ids = [mission_id for mission_id in service.plan_missions(requests, pilots) if mission_id is not None]
+    engine = MissionEngine(service, seconds_per_hour=seconds_per_hour, tick=tick)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        lags, lateness = [], []
+
+        async def sampler():
+            # A coroutine that asks to wake every `probe` seconds measures how late the loop wakes it
+            while True:
+                expected = loop.time() + probe
+                await asyncio.sleep(probe)
+                lags.append(loop.time() - expected)
+
+        def completed(deadline):
+            return lambda _: lateness.append(loop.time() - deadline)
+
+        sampling = loop.create_task(sampler())
+        start = time.perf_counter()
+        futures = []
+        for position, mission_id in enumerate(mission_ids):
+            if position % 100 == 0:
+                await asyncio.sleep(0)  # launch in slices, as requests would arrive, so the loop keeps running
+            deadline = loop.time() + engine.duration(mission_id)
+            future = engine.start_mission(mission_id)
+            future.add_done_callback(completed(deadline))
+            futures.append(future)
+        launching = time.perf_counter() - start
+        await asyncio.gather(*futures)
+        sampling.cancel()
+        return launching, time.perf_counter() - start, lags, lateness
+
+    launching, total, lags, lateness = asyncio.run(run())
+
+    def percentiles(values):
+        cuts = statistics.quantiles(values, n=100)
+        return f"p50 {cuts[49] * 1000:6.2f} ms, p99 {cuts[98] * 1000:6.2f} ms, max {max(values) * 1000:6.2f} ms"
+
+    print(f"Mission engine, {len(mission_ids):,} missions, {tick * 1000:g} ms ticks:")
+    print(f"  {'launching':19s}: {launching * 1000:8.1f} ms")
+    print(f"  {'all completed':19s}: {total:8.2f} s")
+    print(f"  {'event loop lag':19s}: {percentiles(lags)}")
+    print(f"  {'completion lateness':19s}: {percentiles(lateness)}")
+
+
+if __name__ == "__main__":
+    bench_book_search()
+    bench_available_spaceships()
+    bench_plan_missions()
+    bench_mission_engine()
@@ -1,5 +1,8 @@
-from typing import Optional
+import heapq
+from typing import List, Optional
 
+from AdapterPattern.book_index import BookIndex
+from AdapterPattern.registry import Registry
 from AdapterPattern.spaceship_adapter import SpaceshipAdapter
 from Bibliotheque.adresse import Adresse
 from Bibliotheque.bibliotheque import Bibliotheque
@@ -10,22 +13,71 @@ from SpaceShip.spaceship_model import Spaceship
 class BibliothequeSpatiale(Bibliotheque):
     """Extended Library class that includes a fleet of spaceships"""
 
-    def __init__(self, nom: str = "", nombre_de_livres: int = 0, adresse: Optional[Adresse] = None):
+    def __init__(self, nom: str = "", nombre_de_livres: int = 0, adresse: Optional[Adresse] = None,
+                 registry: Optional[Registry] = None):
         super().__init__(nom, nombre_de_livres, adresse)
+        self._registry = registry or Registry()
         self._spaceship_fleet = {}  # name -> SpaceshipAdapter
+        self._available_ships = {}  # name -> SpaceshipAdapter, kept up to date by the adapters
+        self._fuel_heap = []  # (-fuel_level, name), stale entries are skipped and dropped lazily
+        self._books = BookIndex()  # isbn -> book, searchable by title
 
     def add_spaceship(self, spaceship: Spaceship):
-        """Add a spaceship to the library's fleet"""
-        adapter = SpaceshipAdapter(spaceship)
+        """
+        Add a spaceship to the library's fleet, reusing its adapter if it is already in the fleet
+        Adapters, and so loan states, belong to the library: another library adding the same
+        ship gets its own adapter
+        """
+        previous = self._spaceship_fleet.get(spaceship.name)
+        if previous is not None and previous.spaceship is spaceship:
+            return
+        if previous is not None:
+            previous.remove_availability_listener(self._update_availability)
+        adapter = SpaceshipAdapter(spaceship, registry=self._registry)
         self._spaceship_fleet[spaceship.name] = adapter
+        adapter.add_availability_listener(self._update_availability)
+        self._update_availability(adapter)
 
     def get_spaceship(self, name: str) -> Optional[SpaceshipAdapter]:
         """Get a spaceship by name"""
         return self._spaceship_fleet.get(name)
 
     def list_available_spaceships(self):
-        """List all available spaceships"""
-        return [ship for ship in self._spaceship_fleet.values() if ship.est_disponible()]
+        """List all available spaceships, in the order they became available"""
+        return list(self._available_ships.values())
+
+    def top_available_spaceships(self, k: int) -> List[SpaceshipAdapter]:
+        """The k available spaceships with the most fuel, by decreasing fuel level"""
+        top, kept = [], []
+        while self._fuel_heap and len(top) < k:
+            entry = heapq.heappop(self._fuel_heap)
+            adapter = self._available_ships.get(entry[1])
+            if adapter is None or adapter.spaceship.fuel_level != -entry[0]:
+                continue  # stale entry, dropped for good
+            if kept and kept[-1] == entry:
+                continue  # duplicates pop one after the other
+            top.append(adapter)
+            kept.append(entry)
+        for entry in kept:
+            heapq.heappush(self._fuel_heap, entry)
+        return top
+
+    def _update_availability(self, adapter: SpaceshipAdapter):
+        """Keep the availability index in step with an adapter of the fleet"""
+        name = adapter.spaceship.name
+        if self._spaceship_fleet.get(name) is not adapter:
+            return
+        if not adapter.est_disponible():
+            self._available_ships.pop(name, None)
+            return
+
+        self._available_ships[name] = adapter
+        heapq.heappush(self._fuel_heap, (-adapter.spaceship.fuel_level, name))
+        if len(self._fuel_heap) > 2 * len(self._available_ships) + 16:
+            # Too many stale entries: rebuild from the available ships
+            self._fuel_heap = [(-ship.spaceship.fuel_level, ship_name)
+                               for ship_name, ship in self._available_ships.items()]
+            heapq.heapify(self._fuel_heap)
 
     def borrow_spaceship(self, spaceship_name: str, membre: Membre) -> bool:
         """Allow a member to borrow a spaceship"""
@@ -58,17 +110,33 @@ class BibliothequeSpatiale(Bibliotheque):
         return f"{basic_desc} Cette bibliothèque dispose également d'une flotte de {ship_count} vaisseaux spatiaux."
 
     def add_book(self, livre):
-        """Add a book to the library"""
-        if not hasattr(self, '_books'):
-            self._books = {}
-        self._books[livre.isbn] = livre
-        self.nombre_de_livres += 1
+        """Add a book to the library, replacing any book with the same ISBN"""
+        if self._books.add(livre):
+            self.nombre_de_livres += 1
+
+    def remove_book(self, isbn) -> bool:
+        """Remove a book from the library by ISBN"""
+        if self._books.remove(isbn):
+            self.nombre_de_livres -= 1
+            return True
+        return False
+
+    def get_book(self, isbn):
+        """Get a book by ISBN"""
+        return self._books.get(isbn)
 
     def find_book_by_title(self, titre):
-        """Find a book by its title"""
-        if not hasattr(self, '_books'):
-            return None
-        for book in self._books.values():
-            if book.titre == titre:
-                return book
-        return None
+        """Find a book by its exact title"""
+        return self._books.find_by_title(titre)
+
+    def find_books_by_title(self, titre):
+        """Find the books with a title, ignoring case and accents"""
+        return self._books.find_all_by_title(titre)
+
+    def search_books(self, fragment, limit: Optional[int] = None):
+        """Find the books whose title contains a fragment, ignoring case and accents"""
+        return self._books.search(fragment, limit)
+
+    def search_books_by_prefix(self, prefix, limit: Optional[int] = None):
+        """Find the books whose title starts with a prefix, ignoring case and accents"""
+        return self._books.search_prefix(prefix, limit)
@@ -0,0 +1,172 @@
+import array
+import bisect
+import unicodedata
+from typing import Dict, List, Optional
+
+
+def normalize_title(title: str) -> str:
+    """Case and accent insensitive form of a title, with whitespace collapsed"""
+    if not title.isascii():
+        decomposed = unicodedata.normalize("NFKD", title)
+        title = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(title.casefold().split())
+
+
+def _trigrams(key: str):
+    return {key[i:i + 3] for i in range(len(key) - 2)}
+
+
+class BookIndex:
+    """
+    Search index over a collection of books, keyed by ISBN.
+
+    Each book gets an integer slot. Titles are indexed three ways:
+    - exact title -> slots,
+    - normalized title (see normalize_title) -> slots,
+    - trigram of the normalized title -> array('i') of slots, for substring search.
+    A list of normalized titles answers prefix searches by bisection; it is
+    only re-sorted when a prefix search follows additions.
+
+    Removing a book frees its slot; trigram postings and the prefix list keep
+    the stale slot and skip it at query time, so removals stay O(1) (the
+    prefix list drops stale slots when it is re-sorted). Once freed slots
+    outnumber live books, the index is rebuilt from the live books, so its
+    size follows the live count rather than every add ever made.
+    """
+
+    def __init__(self):
+        self._clear()
+
+    def _clear(self):
+        self._books = []  # slot -> book, None once removed
+        self._slots = {}  # isbn -> slot
+        self._exact = {}  # title -> slot, or list of slots if several books share it
+        self._normalized = {}  # normalized title -> slot, or list of slots
+        self._trigrams = {}  # trigram -> array('i') of slots
+        self._keys = []  # normalized title of each slot
+        self._prefixes = []  # (normalized title, slot), for prefix search
+        self._prefixes_sorted = True
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, isbn) -> bool:
+        return isbn in self._slots
+
+    def get(self, isbn):
+        """Get a book by ISBN"""
+        slot = self._slots.get(isbn)
+        return None if slot is None else self._books[slot]
+
+    def add(self, book) -> bool:
+        """Index a book, replacing any book with the same ISBN. Returns True if the ISBN is new."""
+        replaced = self.remove(book.isbn)
+        slot = len(self._books)
+        key = normalize_title(book.titre)
+        self._books.append(book)
+        self._keys.append(key)
+        self._slots[book.isbn] = slot
+        _add_slot(self._exact, book.titre, slot)
+        _add_slot(self._normalized, key, slot)
+        trigrams = self._trigrams
+        for trigram in _trigrams(key):
+            postings = trigrams.get(trigram)
+            if postings is None:
+                postings = trigrams[trigram] = array.array('i')
+            postings.append(slot)
+        self._prefixes.append((key, slot))
+        self._prefixes_sorted = False
+        return not replaced
+
+    def remove(self, isbn) -> bool:
+        """Remove a book by ISBN. Returns False if it was not indexed."""
+        slot = self._slots.pop(isbn, None)
+        if slot is None:
+            return False
+        book = self._books[slot]
+        self._books[slot] = None
+        _remove_slot(self._exact, book.titre, slot)
+        _remove_slot(self._normalized, self._keys[slot], slot)
+        if len(self._books) - len(self._slots) > len(self._slots):
+            self._compact()
+        return True
+
+    def _compact(self):
+        """Rebuild the index from the live books, in insertion order"""
+        books = [book for book in self._books if book is not None]
+        self._clear()
+        for book in books:
+            self.add(book)
+
+    def find_by_title(self, title: str) -> Optional[object]:
+        """First book added with exactly this title"""
+        slots = self._exact.get(title)
+        if slots is None:
+            return None
+        return self._books[slots if isinstance(slots, int) else slots[0]]
+
+    def find_all_by_title(self, title: str) -> List:
+        """Books whose title matches, ignoring case and accents"""
+        slots = self._normalized.get(normalize_title(title), ())
+        return [self._books[slot] for slot in ((slots,) if isinstance(slots, int) else slots)]
+
+    def search(self, fragment: str, limit: Optional[int] = None) -> List:
+        """Books whose title contains a fragment, ignoring case and accents, in insertion order"""
+        key = normalize_title(fragment)
+        if len(key) < 3:
+            candidates = range(len(self._books))
+        else:
+            # The rarest trigram gives the fewest candidates to check
+            candidates = min((self._trigrams.get(trigram, ()) for trigram in _trigrams(key)), key=len)
+        return self._collect((slot for slot in candidates if key in self._keys[slot]), limit)
+
+    def search_prefix(self, prefix: str, limit: Optional[int] = None) -> List:
+        """Books whose title starts with a prefix, ignoring case and accents, by normalized title"""
+        if not self._prefixes_sorted:
+            # Titles appended since the last sort form a second run, which Timsort merges cheaply
+            self._prefixes = [entry for entry in self._prefixes if self._books[entry[1]] is not None]
+            self._prefixes.sort()
+            self._prefixes_sorted = True
+        key = normalize_title(prefix)
+        prefixes = self._prefixes
+
+        def matching_slots():
+            for position in range(bisect.bisect_left(prefixes, (key,)), len(prefixes)):
+                entry_key, slot = prefixes[position]
+                if not entry_key.startswith(key):
+                    return
+                yield slot
+
+        return self._collect(matching_slots(), limit)
+
+    def _collect(self, slots, limit: Optional[int]) -> List:
+        """Live books for slots, up to `limit`"""
+        books = []
+        for slot in slots:
+            book = self._books[slot]
+            if book is None:
+                continue
+            books.append(book)
+            if limit is not None and len(books) >= limit:
+                break
+        return books
+
+
+def _add_slot(mapping: Dict, key: str, slot: int):
+    slots = mapping.get(key)
+    if slots is None:
+        mapping[key] = slot
+    elif isinstance(slots, int):
+        mapping[key] = [slots, slot]
+    else:
+        slots.append(slot)
+
+
+def _remove_slot(mapping: Dict, key: str, slot: int):
+    slots = mapping[key]
+    if isinstance(slots, int):
+        del mapping[key]
+        return
+    slots.remove(slot)
+    if len(slots) == 1:
+        mapping[key] = slots[0]
@@ -1,20 +1,116 @@
 # integration/models.py
-from typing import Optional, List, Dict
-import datetime
+import bisect
+import json
+from collections import OrderedDict
+from typing import Optional, List, Dict, Tuple
 
 from AdapterPattern.bibliotheque_spatiale import BibliothequeSpatiale
 from AdapterPattern.member_pilote import MembrePilote
+from AdapterPattern.unit_of_work import UnitOfWork
+from Bibliotheque.horloge import HORLOGE, Horloge
+
+
+def _fuel_needed(destination: str, book_count: int) -> int:
+    """Fuel a mission consumes, based on its destination and the number of books carried"""
+    return 10 + (len(destination) % 20) + (book_count * 5)
+
+
+def _flight_hours(destination: str) -> float:
+    """Duration of the trip to a destination, in flight hours"""
+    return len(destination) / 10
+
+
+# Statuses after which a mission leaves active_missions for the history
+TERMINAL_STATUSES = ("Completed", "Failed - Insufficient Fuel")
 
 
 class IntergalacticMissionService:
     """Service managing space missions for knowledge exchange"""
 
-    def __init__(self, bibliotheque_spatiale: BibliothequeSpatiale):
+    def __init__(self, bibliotheque_spatiale: BibliothequeSpatiale, horloge: Optional[Horloge] = None,
+                 history_size: int = 1000, history_path: Optional[str] = None):
+        """
+        Missions that reach a terminal status move from active_missions to a
+        history holding the last `history_size` of them. With a
+        `history_path`, each one is also appended to that JSON lines file
+        """
         self.bibliotheque = bibliotheque_spatiale
-        self.active_missions = {}  # mission_id -> mission_details
+        self._horloge = horloge or HORLOGE
+        self.active_missions = {}  # mission_id -> mission_details, until the mission ends
+        self.mission_history = OrderedDict()  # mission_id -> mission_details, oldest first
+        self._history_size = history_size
+        self._history_path = history_path
+        # Indexes of the active missions: key -> {mission_id: None}
+        self._missions_by_status = {}
+        self._missions_by_pilot = {}  # pilot number
+        self._missions_by_spaceship = {}  # spaceship name
         self.mission_counter = 0
         self.last_error = None  # Pour stocker le dernier message d'erreur
 
+    def get_mission(self, mission_id: int) -> Optional[Dict]:
+        """Get an active or recently ended mission"""
+        mission = self.active_missions.get(mission_id)
+        if mission is None:
+            mission = self.mission_history.get(mission_id)
+        return mission
+
+    def get_missions(self, status: Optional[str] = None, pilot: Optional[MembrePilote] = None,
+                     spaceship_name: Optional[str] = None) -> List[Dict]:
+        """
+        Active missions matching every given criterion, by mission ID
+        Only the smallest matching index is scanned
+        """
+        candidates = [index.get(key, {}) for index, key in ((self._missions_by_status, status),
+                                                           (self._missions_by_pilot, pilot and pilot.numero),
+                                                           (self._missions_by_spaceship, spaceship_name))
+                      if key is not None]
+        if not candidates:
+            return list(self.active_missions.values())
+        smallest = min(candidates, key=len)
+        return [self.active_missions[mission_id] for mission_id in sorted(smallest)
+                if all(mission_id in ids for ids in candidates)]
+
+    def _index_mission(self, mission: Dict):
+        mission_id = mission["id"]
+        self._missions_by_status.setdefault(mission["status"], {})[mission_id] = None
+        self._missions_by_pilot.setdefault(mission["pilot"].numero, {})[mission_id] = None
+        self._missions_by_spaceship.setdefault(mission["spaceship"].spaceship.name, {})[mission_id] = None
+
+    def _unindex_mission(self, mission: Dict):
+        mission_id = mission["id"]
+        for index, key in ((self._missions_by_status, mission["status"]),
+                           (self._missions_by_pilot, mission["pilot"].numero),
+                           (self._missions_by_spaceship, mission["spaceship"].spaceship.name)):
+            ids = index.get(key)
+            if ids is not None:
+                ids.pop(mission_id, None)
+                if not ids:
+                    del index[key]
+
+    def _set_status(self, mission: Dict, status: str):
+        """Change the status of an active mission, moving it to the history if it has ended"""
+        self._unindex_mission(mission)
+        mission["status"] = status
+        if status not in TERMINAL_STATUSES:
+            self._index_mission(mission)
+            return
+
+        del self.active_missions[mission["id"]]
+        self.mission_history[mission["id"]] = mission
+        while len(self.mission_history) > self._history_size:
+            self.mission_history.popitem(last=False)
+        if self._history_path is not None:
+            with open(self._history_path, "a", encoding="utf-8") as history:
+                history.write(json.dumps({
+                    "id": mission["id"],
+                    "pilot": mission["pilot"].numero,
+                    "spaceship": mission["spaceship"].spaceship.name,
+                    "destination": mission["destination"],
+                    "books": [book.isbn for book in mission["books"]],
+                    "departure_date": mission["departure_date"].isoformat(),
+                    "status": status,
+                }) + "\n")
+
     def prepare_mission(self, spaceship_name: str, pilot_membre: MembrePilote, destination: str,
                         books_to_transport: list) -> Optional[int]:
         """
@@ -41,31 +137,91 @@ class IntergalacticMissionService:
                 self.last_error = f"Livre {book.titre} non disponible"
                 return None
 
-        # Borrow spaceship and books
-        if not self.bibliotheque.borrow_spaceship(spaceship_name, pilot_membre):
-            self.last_error = "Échec de l'emprunt du vaisseau"
-            return None
+        # Borrow spaceship and books, all or nothing (a book may be taken meanwhile)
+        with UnitOfWork() as work:
+            if not work.borrow_spaceship(self.bibliotheque, spaceship_name, pilot_membre):
+                self.last_error = "Échec de l'emprunt du vaisseau"
+                return None
 
-        for book in books_to_transport:
-            book.emprunter(pilot_membre)
-
-        # Create mission
-        self.mission_counter += 1
-        mission_id = self.mission_counter
-
-        mission_details = {
-            "id": mission_id,
-            "pilot": pilot_membre,
-            "spaceship": spaceship_adapter,
-            "destination": destination,
-            "books": books_to_transport,
-            "departure_date": datetime.date.today(),
-            "status": "Preparing"
-        }
-
-        self.active_missions[mission_id] = mission_details
+            for book in books_to_transport:
+                if not work.borrow_book(book, pilot_membre):
+                    work.rollback()
+                    self.last_error = f"Livre {book.titre} non disponible"
+                    return None
+
+            # Create mission
+            mission_id = self.mission_counter + 1
+            mission_details = {
+                "id": mission_id,
+                "pilot": pilot_membre,
+                "spaceship": spaceship_adapter,
+                "destination": destination,
+                "books": books_to_transport,
+                "departure_date": self._horloge.aujourdhui(),
+                "status": "Preparing"
+            }
+
+            self.active_missions[mission_id] = mission_details
+            self._index_mission(mission_details)
+            self.mission_counter = mission_id
         return mission_id
 
+    def plan_missions(self, requests: List[Tuple[str, list]], pilots: List[MembrePilote]) -> List[Optional[int]]:
+        """
+        Prepare a batch of missions, choosing a ship and a pilot for each one
+        Each request is a (destination, books_to_transport) pair
+        Returns the mission IDs in request order, None for requests that could not be planned
+
+        Requests are served by decreasing fuel needs. Each one gets the
+        available ship with the least fuel that still covers the trip
+        (best fit), among the ships some remaining pilot is qualified for,
+        and the least qualified such pilot. Each ship and pilot serves at
+        most one mission of the batch, and a book at most one request.
+        """
+        # Available ships by required level, each sorted by fuel
+        ships_by_level = {}
+        for adapter in self.bibliotheque.list_available_spaceships():
+            level = MembrePilote.required_level(adapter)
+            ships_by_level.setdefault(level, []).append((adapter.spaceship.fuel_level, adapter.spaceship.name))
+        for ships in ships_by_level.values():
+            ships.sort()
+        # Pilots sorted by qualification level, ties in the given order
+        free_pilots = sorted((pilot.qualification_level, order, pilot) for order, pilot in enumerate(pilots))
+
+        mission_ids = [None] * len(requests)
+        books_taken = set()
+        order = sorted(range(len(requests)), key=lambda i: -_fuel_needed(requests[i][0], len(requests[i][1])))
+        for index in order:
+            destination, books = requests[index]
+            isbns = {book.isbn for book in books}
+            if len(isbns) < len(books) or not isbns.isdisjoint(books_taken) \
+                    or not all(book.est_disponible() for book in books):
+                continue
+
+            fuel = _fuel_needed(destination, len(books))
+            best = None  # (fuel_level, name, ships, position, level)
+            for level, ships in ships_by_level.items():
+                if not free_pilots or free_pilots[-1][0] < level:
+                    continue  # no remaining pilot is qualified for these ships
+                position = bisect.bisect_left(ships, (fuel,))
+                if position < len(ships) and (best is None or ships[position] < best[:2]):
+                    best = ships[position] + (ships, position, level)
+            if best is None:
+                continue
+
+            _, name, ships, position, level = best
+            pilot_position = bisect.bisect_left(free_pilots, (level,))
+            pilot = free_pilots[pilot_position][2]
+            mission_id = self.prepare_mission(name, pilot, destination, books)
+            if mission_id is None:
+                continue
+            del ships[position]
+            del free_pilots[pilot_position]
+            books_taken |= isbns
+            mission_ids[index] = mission_id
+
+        return mission_ids
+
     def launch_mission(self, mission_id: int) -> bool:
         """Launch a prepared mission"""
         if mission_id not in self.active_missions:
@@ -78,20 +234,20 @@ class IntergalacticMissionService:
             return False
 
         # Calculate fuel needed based on books and destination
-        fuel_needed = 10 + (len(mission["destination"]) % 20) + (len(mission["books"]) * 5)
+        fuel_needed = _fuel_needed(mission["destination"], len(mission["books"]))
 
         # Launch the spaceship's mission
         spaceship_adapter = mission["spaceship"]
-        result = spaceship_adapter.spaceship.travel(fuel_needed)
-        if "a voyagé" in result:  # Success indication
-            mission["status"] = "In Progress"
+        if spaceship_adapter.travel_result(fuel_needed).success:
+            self._set_status(mission, "In Progress")
 
             # Log flight hours for the pilot
-            flight_hours = len(mission["destination"]) / 10
-            mission["pilot"].log_flight_hours(flight_hours)
+            mission["pilot"].log_flight_hours(_flight_hours(mission["destination"]))
             return True
         else:
-            mission["status"] = "Failed - Insufficient Fuel"
+            # The mission ends here: give the ship and the books back before it leaves the indexes
+            self._return_resources(mission)
+            self._set_status(mission, "Failed - Insufficient Fuel")
             self.last_error = "Carburant insuffisant"
             return False
 
@@ -106,6 +262,12 @@ class IntergalacticMissionService:
             self.last_error = f"Mission dans un état incorrect: {mission['status']}"
             return False
 
+        self._return_resources(mission, f"This book traveled to {mission['destination']}!")
+        self._set_status(mission, "Completed")
+        return True
+
+    def _return_resources(self, mission: Dict, note: Optional[str] = None):
+        """Return a mission's spaceship and books to the library, adding `note` to the books"""
         # Return spaceship
         spaceship_adapter = mission["spaceship"]
         spaceship_name = spaceship_adapter.spaceship.name
@@ -125,10 +287,7 @@ class IntergalacticMissionService:
                     book.date_retour = None
 
                 # Add a note about intergalactic journey (if the book class supports it)
-                if hasattr(book, 'add_note'):
-                    book.add_note(f"This book traveled to {mission['destination']}!")
+                if note is not None and hasattr(book, 'add_note'):
+                    book.add_note(note)
             except Exception as e:
                 print(f"AVERTISSEMENT lors du retour du livre {book.titre}: {str(e)}")
-
-        mission["status"] = "Completed"
-        return True
\ No newline at end of file
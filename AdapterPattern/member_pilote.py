@@ -31,13 +31,15 @@ class MembrePilote(Membre):
             if self._flight_hours > 100 and self._qualification_level < 5:
                 self._qualification_level += 1
 
-    def can_pilot(self, spaceship_adapter):
-        """Check if the member can pilot a particular spaceship"""
+    @staticmethod
+    def required_level(spaceship_adapter):
+        """Qualification level needed to pilot a particular spaceship"""
         # Règle simple : Enterprise et Millennium Falcon nécessitent un niveau 4+
-        spaceship_name = spaceship_adapter.spaceship.name
-        if spaceship_name in ["Enterprise", "Millennium Falcon"]:
-            required_level = 4
-        else:  # Les autres vaisseaux nécessitent un niveau 2+
-            required_level = 2
+        if spaceship_adapter.spaceship.name in ["Enterprise", "Millennium Falcon"]:
+            return 4
+        # Les autres vaisseaux nécessitent un niveau 2+
+        return 2
 
-        return self._qualification_level >= required_level
\ No newline at end of file
+    def can_pilot(self, spaceship_adapter):
+        """Check if the member can pilot a particular spaceship"""
+        return self._qualification_level >= self.required_level(spaceship_adapter)
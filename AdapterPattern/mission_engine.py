@@ -0,0 +1,142 @@
+import asyncio
+import math
+from typing import Iterable, List, Optional
+
+from AdapterPattern.intergalactic_mission_service import IntergalacticMissionService, _flight_hours
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel: `slots` buckets, each covering one tick
+
+    A timer due at tick t goes in bucket t % slots. Advancing the wheel only
+    visits the buckets of the elapsed ticks, so scheduling is O(1) and
+    expiring costs the size of the visited buckets, whatever the number of
+    pending timers. Timers more than one turn ahead stay in their bucket
+    until their own tick comes round.
+    """
+
+    def __init__(self, slots: int = 1024):
+        self._slots: List[list] = [[] for _ in range(slots)]
+        self._current = 0  # last tick processed
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def current(self) -> int:
+        return self._current
+
+    def schedule(self, tick: int, payload):
+        """Add a timer due at `tick`; a tick already processed fires on the next advance"""
+        tick = max(tick, self._current + 1)
+        self._slots[tick % len(self._slots)].append((tick, payload))
+        self._count += 1
+
+    def advance(self, tick: int) -> list:
+        """Move the wheel to `tick` and return the payloads of the expired timers, by deadline"""
+        expired = []
+        steps = min(tick - self._current, len(self._slots))
+        for step in range(self._current + 1, self._current + steps + 1):
+            bucket = self._slots[step % len(self._slots)]
+            if not bucket:
+                continue
+            pending = [timer for timer in bucket if timer[0] > tick]
+            if len(pending) < len(bucket):
+                expired.extend(timer for timer in bucket if timer[0] <= tick)
+                bucket[:] = pending
+        self._current = max(self._current, tick)
+        self._count -= len(expired)
+        expired.sort(key=lambda timer: timer[0])
+        return [payload for _, payload in expired]
+
+    def clear(self) -> list:
+        """Remove every pending timer and return their payloads, by deadline"""
+        pending = sorted((timer for bucket in self._slots for timer in bucket), key=lambda timer: timer[0])
+        for bucket in self._slots:
+            bucket.clear()
+        self._count = 0
+        return [payload for _, payload in pending]
+
+
+class MissionEngine:
+    """
+    Runs the missions of an IntergalacticMissionService on an asyncio event loop
+
+    A launched mission lasts its flight hours, scaled by `seconds_per_hour`,
+    and is then completed. Completions go through a single TimerWheel driven
+    by one task that wakes up once per tick while missions are in flight,
+    instead of one event loop timer (or one poll) per mission.
+    """
+
+    def __init__(self, service: IntergalacticMissionService, seconds_per_hour: float = 3600.0,
+                 tick: float = 0.01, slots: int = 1024):
+        self.service = service
+        self._seconds_per_hour = seconds_per_hour
+        self._tick = tick
+        self._wheel = TimerWheel(slots)
+        self._origin: Optional[float] = None  # loop time of tick 0
+        self._driver: Optional[asyncio.Task] = None
+
+    def in_flight(self) -> int:
+        """Number of missions waiting for their completion"""
+        return len(self._wheel)
+
+    def duration(self, mission_id: int) -> float:
+        """Travel time of a mission, in seconds"""
+        return _flight_hours(self.service.get_mission(mission_id)["destination"]) * self._seconds_per_hour
+
+    def start_mission(self, mission_id: int) -> "asyncio.Future[bool]":
+        """
+        Launch a prepared mission and schedule its completion
+        Returns a future set to complete_mission's result, or to False at once if the launch fails
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self.service.launch_mission(mission_id):
+            future.set_result(False)
+            return future
+
+        if self._origin is None:
+            self._origin = loop.time()
+        deadline = loop.time() + self.duration(mission_id)
+        self._wheel.schedule(math.ceil((deadline - self._origin) / self._tick), (mission_id, future))
+        if self._driver is None:
+            self._driver = loop.create_task(self._drive())
+        return future
+
+    async def run_mission(self, mission_id: int) -> bool:
+        """Launch a prepared mission and wait until it is completed"""
+        return await self.start_mission(mission_id)
+
+    async def run_missions(self, mission_ids: Iterable[int]) -> List[bool]:
+        """Launch prepared missions together and wait until they are all completed"""
+        return list(await asyncio.gather(*(self.start_mission(mission_id) for mission_id in mission_ids)))
+
+    async def _drive(self):
+        """
+        Advance the wheel tick by tick while missions are in flight
+        A completion that raises fails its own future only; if the driver
+        itself is cancelled, the futures of the missions still in flight are
+        cancelled too, so that no caller waits forever
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while len(self._wheel):
+                next_tick = self._wheel.current + 1
+                await asyncio.sleep(max(0.0, self._origin + next_tick * self._tick - loop.time()))
+                now = int((loop.time() - self._origin) / self._tick)
+                for mission_id, future in self._wheel.advance(max(now, next_tick)):
+                    try:
+                        result = self.service.complete_mission(mission_id)
+                    except Exception as error:
+                        if not future.done():
+                            future.set_exception(error)
+                        continue
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            self._driver = None
+            for _, future in self._wheel.clear():
+                future.cancel()
@@ -0,0 +1,51 @@
+import hashlib
+import weakref
+
+from Bibliotheque.membre import Membre
+from SpaceShip.pilot_model import Pilot
+from SpaceShip.spaceship_model import Spaceship
+
+
+class Registry:
+    """
+    Registry shared by the adapters of a library.
+
+    Spaceship identifiers are a truncated BLAKE2b digest of the ship's name
+    and of nothing else, so a ship gets the same identifier in every process
+    and whatever the registration order. As in a library's fleet, the name
+    is the ship's identity: two ship objects with the same name share an
+    identifier. Two different names whose digests collide are refused with
+    a ValueError rather than given an order-dependent identifier.
+
+    The registry also caches one Pilot per member, so that borrow/return
+    cycles reuse it. The cache holds weak references and forgets members
+    that are no longer used. Each BibliothequeSpatiale gets its own registry
+    unless one is passed to share pilots between libraries.
+    """
+
+    DIGEST_SIZE = 6  # bytes, i.e. 12 hexadecimal characters
+
+    def __init__(self):
+        self._names = {}  # identifier -> name, to detect digest collisions
+        self._pilots = weakref.WeakKeyDictionary()  # member -> Pilot
+
+    def spaceship_identifier(self, spaceship: Spaceship) -> str:
+        """Identifier of a spaceship, derived from its name only"""
+        name = spaceship.name
+        digest = hashlib.blake2b(name.encode(), digest_size=self.DIGEST_SIZE).hexdigest().upper()
+        identifier = f"SHIP-{digest}"
+        known = self._names.setdefault(identifier, name)
+        if known != name:
+            raise ValueError(f"Spaceships {known!r} and {name!r} have the same identifier {identifier}")
+        return identifier
+
+    def pilot_for(self, membre: Membre) -> Pilot:
+        """The Pilot standing for a member, created on first request"""
+        pilot = self._pilots.get(membre)
+        if pilot is None:
+            pilot = self._pilots[membre] = Pilot(membre.nom)
+        return pilot
+
+
+# Default registry, shared by adapters created without one
+REGISTRY = Registry()
@@ -1,15 +1,52 @@
-from SpaceShip.pilot_model import Pilot
-from SpaceShip.spaceship_model import Spaceship
+import weakref
+from typing import Optional
+
+from AdapterPattern.registry import REGISTRY, Registry
+from Bibliotheque.horloge import HORLOGE, Horloge
+from SpaceShip.spaceship_model import Spaceship, TravelResult
+
+
+# Loan period for a spaceship, in days
+LOAN_DAYS = 7
+
+
+def _fuel_listener(adapter_ref):
+    """Fuel listener forwarding to an adapter, without keeping it alive"""
+    def listener(_spaceship):
+        adapter = adapter_ref()
+        if adapter is not None:
+            adapter._notify_availability()
+    return listener
 
 
 class SpaceshipAdapter:
     """Adapter to make Spaceship compatible with library system"""
 
-    def __init__(self, spaceship: Spaceship):
+    def __init__(self, spaceship: Spaceship, horloge: Optional[Horloge] = None, registry: Optional[Registry] = None):
         self.spaceship = spaceship
+        self._horloge = horloge or HORLOGE
+        self._registry = registry or REGISTRY
+        self._isbn = self._registry.spaceship_identifier(spaceship)
         self._checkout_status = "Available"
         self._borrower = None
         self._return_date = None
+        self._availability_listeners = []
+        # The ship only holds a weak reference to the adapter, and drops the listener once the adapter is gone
+        listener = _fuel_listener(weakref.ref(self))
+        spaceship.add_fuel_listener(listener)
+        weakref.finalize(self, spaceship.remove_fuel_listener, listener)
+
+    def add_availability_listener(self, listener):
+        """Register a function called with the adapter whenever its status or its ship's fuel changes"""
+        self._availability_listeners.append(listener)
+
+    def remove_availability_listener(self, listener):
+        """Unregister a function registered with add_availability_listener"""
+        self._availability_listeners.remove(listener)
+
+    def _notify_availability(self, _spaceship=None):
+        for listener in self._availability_listeners:
+            listener(self)
 
     @property
     def titre(self):
@@ -17,8 +54,8 @@ class SpaceshipAdapter:
 
     @property
     def isbn(self):
-        # Generate a unique identifier for the spaceship
-        return f"SHIP-{hash(self.spaceship.name) % 10000:04d}"
+        # Stable identifier issued by the registry at construction
+        return self._isbn
 
     @property
     def statut(self):
@@ -27,6 +64,7 @@ class SpaceshipAdapter:
     @statut.setter
     def statut(self, value):
         self._checkout_status = value
+        self._notify_availability()
 
     @property
     def emprunteur(self):
@@ -44,17 +82,24 @@ class SpaceshipAdapter:
     def date_retour(self, date):
         self._return_date = date
 
+    def travel_result(self, fuel_used: int) -> TravelResult:
+        """Fly the adapted spaceship, without building a travel message"""
+        return self.spaceship.travel_result(fuel_used)
+
     def est_disponible(self):
         return self._checkout_status == "Available" and self.spaceship.fuel_level > 0
 
+    def pilot_for(self, membre):
+        """The Pilot that flies this spaceship when the member borrows it"""
+        return self._registry.pilot_for(membre)
+
     def emprunter(self, membre):
         """Allow a library member to borrow the spaceship"""
         if not self.est_disponible():
             raise ValueError(f"Spaceship {self.spaceship.name} is not available")
 
-        # Convert the member to a pilot
-        pilot_name = membre.nom
-        pilot = Pilot(pilot_name)
+        # Convert the member to a pilot, the same one on every loan
+        pilot = self.pilot_for(membre)
 
         # Assign the pilot to the spaceship
         self.spaceship.assign_pilot(pilot)
@@ -63,8 +108,8 @@ class SpaceshipAdapter:
         self._checkout_status = "Checked Out"
         self._borrower = membre
 
-        import datetime
-        self._return_date = datetime.date.today() + datetime.timedelta(days=7)
+        self._return_date = self._horloge.echeance(LOAN_DAYS)
+        self._notify_availability()
         return True
 
     def retourner(self):
@@ -72,11 +117,16 @@ class SpaceshipAdapter:
         if self._checkout_status != "Checked Out":
             raise ValueError(f"Spaceship {self.spaceship.name} is not checked out")
 
-        # Remove pilot association
+        # Remove pilot association, on both sides since pilots are reused,
+        # unless the pilot has moved on to another ship since
+        pilot = self.spaceship.pilot
+        if pilot is not None and pilot.spaceship is self.spaceship:
+            pilot.spaceship = None
         self.spaceship.pilot = None
 
         # Update status
         self._checkout_status = "Available"
         self._borrower = None
         self._return_date = None
+        self._notify_availability()
         return True
\ No newline at end of file
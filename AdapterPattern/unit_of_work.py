@@ -0,0 +1,96 @@
+from typing import Callable, List
+
+from Bibliotheque.membre import Membre
+
+# Loan attributes shared by Livre, LivreCatalogue and SpaceshipAdapter
+_LOAN_ATTRIBUTES = ("statut", "emprunteur", "date_retour")
+
+
+class UnitOfWork:
+    """
+    Groups loans so that they take effect together or not at all
+
+    Each operation is applied at once and records how to undo it.
+    rollback() undoes the recorded operations in reverse order and restores
+    the previous state exactly (a rolled back ship is not refuelled, and
+    gets its previous pilot back); commit() forgets them. Used as a context
+    manager, the unit commits on normal exit and rolls back on exception.
+    """
+
+    def __init__(self):
+        self._undo: List[Callable[[], None]] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    def on_rollback(self, action: Callable[[], None]):
+        """Record an action to run if the unit is rolled back"""
+        self._undo.append(action)
+
+    def borrow_book(self, book, membre: Membre) -> bool:
+        """Lend a book (Livre or compatible) to a member. Returns False if it cannot be lent"""
+        restore = self._snapshot(book)
+        try:
+            book.emprunter(membre)
+        except ValueError:
+            restore()
+            return False
+        self.on_rollback(restore)
+        return True
+
+    def borrow_spaceship(self, bibliotheque, spaceship_name: str, membre: Membre) -> bool:
+        """Lend a spaceship of a BibliothequeSpatiale to a member. Returns False if it cannot be lent"""
+        adapter = bibliotheque.get_spaceship(spaceship_name)
+        if adapter is None:
+            return False
+
+        spaceship = adapter.spaceship
+        previous_pilot = spaceship.pilot
+        # Pilots are shared per member: this one may already fly another ship
+        pilot = adapter.pilot_for(membre)
+        pilot_previous_ship = pilot.spaceship
+        restore_adapter = self._snapshot(adapter)
+
+        def restore():
+            pilot.spaceship = pilot_previous_ship
+            spaceship.pilot = previous_pilot
+            restore_adapter()
+
+        try:
+            borrowed = bibliotheque.borrow_spaceship(spaceship_name, membre)
+        except ValueError:
+            borrowed = False
+        if not borrowed:
+            restore()
+            return False
+
+        self.on_rollback(lambda: membre.supprimer_emprunt(adapter))
+        self.on_rollback(restore)
+        return True
+
+    def commit(self):
+        """Keep every operation of the unit"""
+        self._undo.clear()
+
+    def rollback(self):
+        """Undo every operation of the unit, most recent first"""
+        while self._undo:
+            self._undo.pop()()
+
+    @staticmethod
+    def _snapshot(loanable) -> Callable[[], None]:
+        """A function restoring the current loan state of a book or spaceship adapter"""
+        state = [(name, getattr(loanable, name)) for name in _LOAN_ATTRIBUTES]
+
+        def restore():
+            for name, value in state:
+                setattr(loanable, name, value)
+
+        return restore
@@ -0,0 +1,99 @@
+# archive_reservation.py
+import datetime
+import gzip
+import json
+import os
+import threading
+
+
+class ArchiveReservations:
+    """
+    Archive compressée des réservations passées, en ajout seul.
+
+    Chaque purge ajoute un membre gzip de lignes JSON au fichier ; les
+    consultations relisent le fichier en flux, sans le charger en mémoire.
+    Une ligne est un tuple (code, code_salle, identifiant, nom, debut, fin),
+    comme pour les stockages de réservations.
+    """
+
+    def __init__(self, chemin):
+        self._chemin = chemin
+        self._verrou = threading.Lock()
+        self._limite = None  # lendemain de la dernière date archivée, calculé au premier besoin
+        self._limite_connue = False
+
+    @property
+    def chemin(self):
+        return self._chemin
+
+    @property
+    def limite(self):
+        """
+        Date à partir de laquelle l'archive ne contient aucune réservation,
+        ou None si elle est vide. Le premier appel relit l'archive.
+        """
+        if not self._limite_connue:
+            dernier = max((ligne[4].date() for ligne in self.parcourir()), default=None)
+            self._etendre_limite(dernier)
+            self._limite_connue = True
+        return self._limite
+
+    def ajouter(self, lignes):
+        """
+        Ajoute des réservations à la fin de l'archive et les écrit sur disque
+        avant de rendre la main. En cas d'échec, l'archive est laissée telle
+        qu'elle était.
+        """
+        lignes = list(lignes)
+        if not lignes:
+            return
+        texte = "".join(json.dumps([code, salle, identifiant, nom, debut.isoformat(), fin.isoformat()]) + "\n"
+                        for code, salle, identifiant, nom, debut, fin in lignes)
+        with self._verrou, open(self._chemin, "ab") as fichier:
+            taille = fichier.tell()
+            try:
+                # Un membre gzip de plus, ajouté d'un seul bloc
+                fichier.write(gzip.compress(texte.encode("utf-8")))
+                fichier.flush()
+                os.fsync(fichier.fileno())
+            except BaseException:
+                fichier.truncate(taille)
+                raise
+            self._etendre_limite(max(ligne[4] for ligne in lignes).date())
+
+    def _etendre_limite(self, dernier_jour):
+        if dernier_jour is not None:
+            limite = dernier_jour + datetime.timedelta(days=1)
+            if self._limite is None or limite > self._limite:
+                self._limite = limite
+
+    def parcourir(self):
+        """Parcourt toutes les réservations archivées, dans l'ordre d'archivage."""
+        try:
+            fichier = gzip.open(self._chemin, "rt", encoding="utf-8")
+        except FileNotFoundError:
+            return
+        fromisoformat = datetime.datetime.fromisoformat
+        with fichier:
+            for texte in fichier:
+                code, salle, identifiant, nom, debut, fin = json.loads(texte)
+                yield code, salle, identifiant, nom, fromisoformat(debut), fromisoformat(fin)
+
+    def reservations_salle(self, code_salle, date):
+        """Réservations archivées d'une salle pour une date, par heure de début."""
+        return sorted((ligne for ligne in self.parcourir()
+                       if ligne[1] == code_salle and ligne[4].date() == date), key=lambda ligne: ligne[4])
+
+    def reservations_date(self, date):
+        """Réservations archivées de toutes les salles pour une date."""
+        return sorted((ligne for ligne in self.parcourir() if ligne[4].date() == date),
+                      key=lambda ligne: (ligne[1], ligne[4]))
+
+    def reservations_utilisateur(self, identifiant, debut=None, fin=None):
+        """
+        Réservations archivées d'un utilisateur, par heure de début, limitées
+        aux dates comprises entre `debut` et `fin` (incluses) si elles sont données.
+        """
+        return sorted((ligne for ligne in self.parcourir() if ligne[2] == identifiant
+                       and (debut is None or ligne[4].date() >= debut)
+                       and (fin is None or ligne[4].date() <= fin)), key=lambda ligne: ligne[4])
@@ -0,0 +1,370 @@
+# benchmark.py
+"""
+Mesures de performance du module Bibliotheque.
+
+Exécution : python -m Bibliotheque.benchmark
+"""
+import concurrent.futures
+import datetime
+import os
+import random
+import string
+import tempfile
+import time
+import tracemalloc
+
+from Bibliotheque.catalogue import Catalogue
+from Bibliotheque.emprunt import SystemeEmprunt
+from Bibliotheque.generateur_code import GenerateurCodeReservation
+from Bibliotheque.horloge import Horloge
+from Bibliotheque.livre import Livre
+from Bibliotheque.membre import Membre
+from Bibliotheque.salle import Salle
+from Bibliotheque.stockage_reservation import StockageSQLite
+from Bibliotheque.systeme_reservation import SystemeReservation
+from Bibliotheque.utilisateur import Utilisateur
+
+
+def _chrono(fonction, *args):
+    """Exécute une fonction et renvoie la durée écoulée en secondes."""
+    debut = time.perf_counter()
+    fonction(*args)
+    return time.perf_counter() - debut
+
+
+def _creneaux_du_jour(nombre, jour=datetime.date(2030, 1, 15)):
+    """Génère des créneaux d'une seconde, séparés par deux secondes libres."""
+    minuit = datetime.datetime.combine(jour, datetime.time(0, 0))
+    seconde = datetime.timedelta(seconds=1)
+    for i in range(nombre):
+        debut = minuit + 3 * i * seconde
+        yield debut, debut + seconde
+
+
+def _disponible_par_parcours(salle, debut, fin):
+    """Ancien test de disponibilité : parcours linéaire des créneaux du jour."""
+    for heure_debut_res, (heure_fin_res, _, _) in salle._reservations.get(debut.date(), {}).items():
+        if debut <= heure_fin_res and fin >= heure_debut_res:
+            return False
+    return True
+
+
+def bench_salle(nombre=10_000):
+    """Remplit une journée de `nombre` créneaux et compare les tests de disponibilité."""
+    creneaux = list(_creneaux_du_jour(nombre))
+    salle = Salle("BENCH", 10)
+
+    def remplir():
+        for i, (debut, fin) in enumerate(creneaux):
+            salle.ajouter_reservation(debut, fin, None, f"RES{i}")
+
+    def verifier(test):
+        for debut, fin in creneaux:
+            test(debut, fin)
+
+    duree_remplissage = _chrono(remplir)
+    duree_index = _chrono(verifier, salle.est_disponible_pour_creneau)
+    duree_parcours = _chrono(verifier, lambda d, f: _disponible_par_parcours(salle, d, f))
+
+    print(f"Salle : {nombre} réservations sur une journée")
+    print(f"  remplissage (index trié) : {duree_remplissage:.3f} s")
+    print(f"  tests (index trié)       : {duree_index:.3f} s")
+    print(f"  tests (parcours linéaire): {duree_parcours:.3f} s")
+
+
+def _systeme_et_demandes(nombre_salles, nombre_jours, stockage=None):
+    """Construit un système et des demandes de 30 minutes couvrant chaque journée."""
+    systeme = SystemeReservation(stockage=stockage)
+    demain = datetime.date.today() + datetime.timedelta(days=1)
+    demandes = []
+    for s in range(nombre_salles):
+        salle = Salle(f"S{s:04d}", 4)
+        systeme.ajouter_salle(salle)
+        utilisateur = Utilisateur(f"Utilisateur {s}", f"U{s:04d}")
+        for j in range(nombre_jours):
+            ouverture = datetime.datetime.combine(demain + datetime.timedelta(days=j), datetime.time(9, 0))
+            for c in range(17):
+                debut = ouverture + datetime.timedelta(minutes=31 * c)
+                demandes.append((salle, utilisateur, debut, debut + datetime.timedelta(minutes=30)))
+    return systeme, demandes
+
+
+def bench_reservation_en_masse(nombre_salles=100, nombre_jours=30):
+    """Compare reserver_salles_en_masse à une boucle sur reserver_salle."""
+    systeme, demandes = _systeme_et_demandes(nombre_salles, nombre_jours)
+    duree_masse = _chrono(systeme.reserver_salles_en_masse, demandes)
+
+    systeme, demandes = _systeme_et_demandes(nombre_salles, nombre_jours)
+
+    def boucle():
+        for demande in demandes:
+            systeme.reserver_salle(*demande)
+
+    duree_boucle = _chrono(boucle)
+
+    nombre = len(demandes)
+    print(f"Réservations : {nombre} demandes")
+    print(f"  en masse       : {duree_masse:.3f} s ({nombre / duree_masse:,.0f} réservations/s)")
+    print(f"  reserver_salle : {duree_boucle:.3f} s ({nombre / duree_boucle:,.0f} réservations/s)")
+
+
+def bench_creneaux_libres(nombre_salles=5000):
+    """Recherche de créneaux libres parmi des salles presque pleines."""
+    systeme = SystemeReservation()
+    demain = datetime.date.today() + datetime.timedelta(days=1)
+    utilisateur = Utilisateur("Utilisateur", "U0000")
+    demandes = []
+    for s in range(nombre_salles):
+        salle = Salle(f"S{s:05d}", 2 + s % 20)
+        systeme.ajouter_salle(salle)
+        ouverture = datetime.datetime.combine(demain, datetime.time(9, 0))
+        for c in range(15):
+            debut = ouverture + datetime.timedelta(minutes=31 * c)
+            demandes.append((salle, utilisateur, debut, debut + datetime.timedelta(minutes=30)))
+    systeme.reserver_salles_en_masse(demandes)
+
+    une_heure = datetime.timedelta(hours=1)
+
+    def chercher(capacite_min, nombre):
+        return list(systeme.chercher_creneaux_libres(une_heure, demain, capacite_min, (14, 18), nombre))
+
+    print(f"Créneaux libres : {nombre_salles} salles")
+    print(f"  10 premiers, capacité >= 18 : {_chrono(chercher, 18, 10) * 1000:.2f} ms")
+    print(f"  tous, capacité >= 18        : {_chrono(chercher, 18, None) * 1000:.2f} ms")
+
+
+def _code_aleatoire(existants, longueur=8):
+    """Ancienne génération : tirage caractère par caractère, rejoué en cas de collision."""
+    caracteres = string.ascii_uppercase + string.digits
+    code = 'RES' + ''.join(random.choice(caracteres) for _ in range(longueur))
+    while code in existants:
+        code = 'RES' + ''.join(random.choice(caracteres) for _ in range(longueur))
+    return code
+
+
+def bench_generateur_code(nombre_existants=1_000_000, nombre=100_000):
+    """Compare les générateurs de codes avec `nombre_existants` codes déjà attribués."""
+    generateur = GenerateurCodeReservation()
+    existants = {generateur() for _ in range(nombre_existants)}
+
+    def aleatoire():
+        for _ in range(nombre):
+            existants.add(_code_aleatoire(existants))
+
+    def permutation():
+        for _ in range(nombre):
+            existants.add(generateur())
+
+    duree_aleatoire = _chrono(aleatoire)
+    duree_permutation = _chrono(permutation)
+    print(f"Codes : {nombre} nouveaux codes, {nombre_existants} existants")
+    print(f"  tirage aléatoire : {duree_aleatoire * 1e9 / nombre:.0f} ns/code")
+    print(f"  permutation      : {duree_permutation * 1e9 / nombre:.0f} ns/code")
+
+
+def _tentatives(systeme, salles, nombre, graine):
+    """Tente `nombre` réservations d'une heure, à cheval sur des créneaux déjà pris."""
+    alea = random.Random(graine)
+    utilisateur = Utilisateur(f"Utilisateur {graine}", f"U{graine:04d}")
+    demain = datetime.date.today() + datetime.timedelta(days=1)
+    codes = []
+    for _ in range(nombre):
+        jour = demain + datetime.timedelta(days=alea.randrange(30))
+        debut = datetime.datetime.combine(jour, datetime.time(9, 0)) + datetime.timedelta(minutes=15 * alea.randrange(28))
+        try:
+            codes.append(systeme.reserver_salle(alea.choice(salles), utilisateur, debut,
+                                                debut + datetime.timedelta(hours=1)))
+        except ValueError:
+            pass
+    return codes
+
+
+def bench_concurrence(nombre_fils=8, tentatives=5000):
+    """Stress du mode concurrent : absence de double réservation et débit selon le nombre de salles."""
+    print(f"Mode concurrent : {nombre_fils} fils x {tentatives} tentatives")
+    for nombre_salles in (1, 4, 16, 64):
+        systeme = SystemeReservation(concurrent=True)
+        salles = [Salle(f"S{s:03d}", 4) for s in range(nombre_salles)]
+        for salle in salles:
+            systeme.ajouter_salle(salle)
+
+        debut = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(nombre_fils) as executeur:
+            resultats = executeur.map(_tentatives, [systeme] * nombre_fils, [salles] * nombre_fils,
+                                      [tentatives] * nombre_fils, range(nombre_fils))
+            codes = [code for codes_fil in resultats for code in codes_fil]
+        duree = time.perf_counter() - debut
+
+        # Aucune salle ne doit contenir deux créneaux qui se chevauchent
+        for salle in salles:
+            for date in list(salle._reservations):
+                occupes = list(salle.creneaux_occupes(date))
+                assert all(fin < suivant for (_, fin), (suivant, _) in zip(occupes, occupes[1:]))
+        assert len(codes) == len(systeme._reservations)
+
+        print(f"  {nombre_salles:3d} salles : {len(codes):6d} réservations, "
+              f"{nombre_fils * tentatives / duree:,.0f} tentatives/s")
+
+
+def bench_stockage(nombre_salles=10, nombre_jours=10):
+    """Débit de réservation en mémoire et avec un stockage SQLite sur disque."""
+    print(f"Stockage : {nombre_salles * nombre_jours * 17} réservations")
+    with tempfile.TemporaryDirectory() as dossier:
+        configurations = [("mémoire", None, False)]
+        for taille_lot in (1, 100):
+            configurations.append((f"SQLite, lots de {taille_lot}",
+                                   StockageSQLite(os.path.join(dossier, f"lot{taille_lot}.db"), taille_lot), False))
+        configurations.append(("SQLite, en masse", StockageSQLite(os.path.join(dossier, "masse.db")), True))
+
+        for libelle, stockage, en_masse in configurations:
+            systeme, demandes = _systeme_et_demandes(nombre_salles, nombre_jours, stockage)
+
+            def reserver():
+                if en_masse:
+                    systeme.reserver_salles_en_masse(demandes)
+                else:
+                    for demande in demandes:
+                        systeme.reserver_salle(*demande)
+                if stockage is not None:
+                    stockage.valider()
+
+            duree = _chrono(reserver)
+            print(f"  {libelle:20s}: {len(demandes) / duree:,.0f} réservations/s")
+            if stockage is not None:
+                stockage.fermer()
+
+
+def _memoire(fonction):
+    """Exécute une fonction et renvoie la mémoire qu'elle a allouée et conservée, en octets."""
+    tracemalloc.start()
+    try:
+        avant = tracemalloc.get_traced_memory()[0]
+        resultat = fonction()
+        apres = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del resultat
+    return apres - avant
+
+
+def bench_catalogue(nombre=1_000_000):
+    """Compare la mémoire occupée par des objets Livre et par un Catalogue."""
+    titres = [f"Livre {i}" for i in range(nombre)]
+    isbns = [f"978-{i:09d}" for i in range(nombre)]
+    echeance = datetime.date.today() + datetime.timedelta(days=21)
+
+    def livres():
+        resultat = {isbn: Livre(titre, isbn) for titre, isbn in zip(titres, isbns)}
+        for indice in range(0, nombre, 2):
+            livre = resultat[isbns[indice]]
+            livre.statut = "Emprunté"
+            livre.date_retour = echeance + datetime.timedelta(days=indice % 30)
+        return resultat
+
+    def catalogue():
+        resultat = Catalogue()
+        for titre, isbn in zip(titres, isbns):
+            resultat.ajouter(titre, isbn)
+        for indice in range(0, nombre, 2):
+            vue = resultat[isbns[indice]]
+            vue.statut = "Emprunté"
+            vue.date_retour = echeance + datetime.timedelta(days=indice % 30)
+        return resultat
+
+    print(f"Catalogue de {nombre:,} livres (moitié empruntés, titres et ISBN partagés) :")
+    for libelle, fonction in (("Livre par ISBN", livres), ("Catalogue", catalogue)):
+        print(f"  {libelle:14s}: {_memoire(fonction) / nombre:6.1f} octets/livre")
+
+
+def bench_horloge(nombre=500_000):
+    """Compare le calcul d'une date de retour : date.today() à chaque appel, ou Horloge."""
+    horloge = Horloge()
+
+    def directement():
+        for _ in range(nombre):
+            datetime.date.today() + datetime.timedelta(days=21)
+
+    def par_horloge():
+        for _ in range(nombre):
+            horloge.echeance(21)
+
+    print(f"Calcul de {nombre:,} dates de retour :")
+    for libelle, fonction in (("date.today()", directement), ("Horloge", par_horloge)):
+        print(f"  {libelle:12s}: {nombre / _chrono(fonction):,.0f} dates/s")
+
+
+def bench_emprunt_lot(nombre=10_000):
+    """
+    Compare l'emprunt puis le retour de `nombre` livres par un membre, livre
+    par livre ou par lot. Les livres sont rendus dans l'ordre inverse.
+    """
+    print(f"Emprunt puis retour de {nombre:,} livres par un même membre :")
+    for libelle, par_lot in (("livre par livre", False), ("par lot", True)):
+        systeme = SystemeEmprunt()
+        membre = Membre("Marie Curie", "M001")
+        livres = [Livre(f"Livre {i}", f"978-{i:09d}") for i in range(nombre)]
+
+        def emprunter_et_retourner():
+            if par_lot:
+                systeme.emprunter_lot(livres, membre)
+                systeme.retourner_lot(reversed(livres))
+            else:
+                for livre in livres:
+                    systeme.emprunter_livre(livre, membre)
+                for livre in reversed(livres):
+                    systeme.retourner_livre(livre)
+
+        print(f"  {libelle:15s}: {_chrono(emprunter_et_retourner) * 1000:8.1f} ms")
+
+
+def _catalogue_et_membres(nombre):
+    """Crée un catalogue de `nombre` livres et cent fois moins de membres."""
+    catalogue = Catalogue()
+    for i in range(nombre):
+        catalogue.ajouter(f"Livre {i}", f"978-{i:09d}")
+    return catalogue, {f"M{i:05d}": Membre(f"Membre {i}", f"M{i:05d}") for i in range(nombre // 100)}
+
+
+def bench_instantane(nombre=1_000_000):
+    """Mesure la sauvegarde et le rechargement d'un instantané de `nombre` emprunts."""
+    catalogue, membres = _catalogue_et_membres(nombre)
+    systeme = SystemeEmprunt()
+    for i, livre in enumerate(catalogue):
+        systeme.emprunter_livre(livre, membres[f"M{i % len(membres):05d}"])
+
+    print(f"Instantané de {nombre:,} emprunts :")
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "emprunts.bin")
+        print(f"  {'sauvegarde':27s}: {_chrono(systeme.sauvegarder, chemin):6.2f} s "
+              f"({os.path.getsize(chemin) / nombre:.0f} octets/emprunt)")
+
+        catalogue, membres = _catalogue_et_membres(nombre)
+        isbns = [f"978-{random.randrange(nombre):09d}" for _ in range(10_000)]
+
+        debut = time.perf_counter()
+        recharge = SystemeEmprunt.charger(chemin, catalogue, membres)
+        for isbn in isbns:
+            recharge.emprunteur(isbn)
+        print(f"  {'chargement + 10k recherches':27s}: {time.perf_counter() - debut:6.2f} s")
+
+        def retours():
+            for isbn in isbns[:1000]:
+                livre = catalogue[isbn]
+                if not livre.est_disponible():
+                    recharge.retourner_livre(livre)
+
+        print(f"  {'1k retours':27s}: {_chrono(retours):6.2f} s")
+        print(f"  {'matérialisation':27s}: {_chrono(recharge.materialiser):6.2f} s")
+
+
+if __name__ == "__main__":
+    bench_salle()
+    bench_reservation_en_masse()
+    bench_creneaux_libres()
+    bench_generateur_code()
+    bench_concurrence()
+    bench_stockage()
+    bench_catalogue()
+    bench_horloge()
+    bench_emprunt_lot()
+    bench_instantane()
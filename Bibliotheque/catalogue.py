@@ -0,0 +1,185 @@
+# catalogue.py
+import array
+import datetime
+import sys
+
+from .horloge import HORLOGE
+from .livre import DUREE_EMPRUNT
+
+DISPONIBLE = "Disponible"
+EMPRUNTE = "Emprunté"
+_STATUTS = (DISPONIBLE, EMPRUNTE)  # code stocké -> statut
+_CODES_STATUT = {statut: code for code, statut in enumerate(_STATUTS)}
+_SANS_DATE = 0
+_LIBRE = -1  # case vide de la table d'index
+
+
+class Catalogue:
+    """
+    Catalogue de livres stocké par colonnes.
+
+    Plutôt qu'un objet Livre par exemplaire, le catalogue garde une colonne par
+    attribut : titres et ISBN (internés) dans des listes, statuts dans un
+    tableau d'octets et dates de retour en ordinaux dans un array('i'). Les
+    emprunteurs, seuls objets par exemplaire, ne sont gardés que pour les
+    livres empruntés. Les livres sont manipulés au travers de vues
+    LivreCatalogue, compatibles avec Livre.
+
+    L'index par ISBN est une table de hachage à adressage ouvert stockée dans
+    un array('i') (4 octets par case, au plus une case sur deux occupée), bien
+    plus compacte qu'un dictionnaire.
+    """
+
+    def __init__(self, horloge=None):
+        self._horloge = horloge or HORLOGE
+        self._titres = []
+        self._isbns = []
+        self._statuts = bytearray()
+        self._retours = array.array('i')  # ordinal de la date de retour, 0 si aucune
+        self._emprunteurs = {}  # indice -> membre, pour les livres empruntés
+        self._table = array.array('i', [_LIBRE]) * 8  # hachage de l'ISBN -> indice
+
+    def ajouter(self, titre, isbn):
+        """Ajoute un livre disponible au catalogue et renvoie sa vue."""
+        case = self._case(isbn)
+        if self._table[case] != _LIBRE:
+            raise ValueError(f"Un livre avec l'ISBN {isbn} existe déjà")
+
+        indice = len(self._isbns)
+        self._titres.append(titre)
+        self._isbns.append(sys.intern(isbn))
+        self._statuts.append(_CODES_STATUT[DISPONIBLE])
+        self._retours.append(_SANS_DATE)
+        self._table[case] = indice
+        if 2 * len(self._isbns) > len(self._table):
+            self._agrandir_table()
+        return LivreCatalogue(self, indice)
+
+    def get(self, isbn, defaut=None):
+        """Renvoie la vue du livre d'ISBN donné, ou `defaut`."""
+        indice = self._table[self._case(isbn)]
+        return defaut if indice == _LIBRE else LivreCatalogue(self, indice)
+
+    def __getitem__(self, isbn):
+        livre = self.get(isbn)
+        if livre is None:
+            raise KeyError(isbn)
+        return livre
+
+    def __contains__(self, isbn):
+        return self._table[self._case(isbn)] != _LIBRE
+
+    def __len__(self):
+        return len(self._isbns)
+
+    def __iter__(self):
+        return (LivreCatalogue(self, indice) for indice in range(len(self._isbns)))
+
+    def _case(self, isbn):
+        """Case de la table qui contient l'ISBN, ou la case libre où l'insérer."""
+        table, isbns = self._table, self._isbns
+        masque = len(table) - 1
+        case = hash(isbn) & masque
+        while True:
+            indice = table[case]
+            if indice == _LIBRE or isbns[indice] == isbn:
+                return case
+            case = (case + 1) & masque
+
+    def _agrandir_table(self):
+        """Double la taille de la table d'index et y replace tous les livres."""
+        self._table = table = array.array('i', [_LIBRE]) * (2 * len(self._table))
+        masque = len(table) - 1
+        for indice, isbn in enumerate(self._isbns):
+            case = hash(isbn) & masque
+            while table[case] != _LIBRE:
+                case = (case + 1) & masque
+            table[case] = indice
+
+
+class LivreCatalogue:
+    """
+    Vue sur un livre d'un Catalogue, avec la même interface que Livre.
+    Deux vues sur le même exemplaire sont égales.
+    """
+
+    __slots__ = ('_catalogue', '_indice')
+
+    def __init__(self, catalogue, indice):
+        self._catalogue = catalogue
+        self._indice = indice
+
+    @property
+    def titre(self):
+        return self._catalogue._titres[self._indice]
+
+    @property
+    def isbn(self):
+        return self._catalogue._isbns[self._indice]
+
+    @property
+    def statut(self):
+        return _STATUTS[self._catalogue._statuts[self._indice]]
+
+    @statut.setter
+    def statut(self, statut):
+        if statut not in _CODES_STATUT:
+            raise ValueError(f"Statut inconnu : {statut}")
+        self._catalogue._statuts[self._indice] = _CODES_STATUT[statut]
+
+    @property
+    def emprunteur(self):
+        return self._catalogue._emprunteurs.get(self._indice)
+
+    @emprunteur.setter
+    def emprunteur(self, membre):
+        if membre is None:
+            self._catalogue._emprunteurs.pop(self._indice, None)
+        else:
+            self._catalogue._emprunteurs[self._indice] = membre
+
+    @property
+    def date_retour(self):
+        ordinal = self._catalogue._retours[self._indice]
+        return None if ordinal == _SANS_DATE else datetime.date.fromordinal(ordinal)
+
+    @date_retour.setter
+    def date_retour(self, date):
+        self._catalogue._retours[self._indice] = _SANS_DATE if date is None else date.toordinal()
+
+    def est_disponible(self):
+        """
+        Vérifie si le livre est disponible pour emprunt.
+        """
+        return self._catalogue._statuts[self._indice] == _CODES_STATUT[DISPONIBLE]
+
+    def emprunter(self, membre):
+        """
+        Marque le livre comme emprunté par un membre.
+        """
+        if not self.est_disponible():
+            raise ValueError(f"Le livre {self.titre} n'est pas disponible")
+
+        self.statut = EMPRUNTE
+        self.emprunteur = membre
+        self.date_retour = self._catalogue._horloge.echeance(DUREE_EMPRUNT)
+        return True
+
+    def retourner(self):
+        """
+        Marque le livre comme retourné et disponible.
+        """
+        if self.statut != EMPRUNTE:
+            raise ValueError(f"Le livre {self.titre} n'est pas emprunté")
+
+        self.statut = DISPONIBLE
+        self.emprunteur = None
+        self.date_retour = None
+        return True
+
+    def __eq__(self, autre):
+        return (isinstance(autre, LivreCatalogue) and self._catalogue is autre._catalogue
+                and self._indice == autre._indice)
+
+    def __hash__(self):
+        return hash((id(self._catalogue), self._indice))
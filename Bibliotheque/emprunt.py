@@ -1,21 +1,242 @@
 # emprunt.py
+import bisect
+
+from .horloge import HORLOGE
+from .instantane_emprunt import InstantaneEmprunts
+
+
 class SystemeEmprunt:
     """Classe gérant les emprunts de livres."""
 
-    def __init__(self):
-        self._emprunts_actifs = {}
+    def __init__(self, quota=None, horloge=None):
+        """
+        Initialise le système. `quota` limite, s'il est donné, le nombre
+        d'emprunts en cours par membre ; `horloge` (voir horloge) donne la
+        date du jour.
+        """
+        self._quota = quota
+        self._horloge = horloge or HORLOGE
+        self._emprunts_actifs = {}  # isbn -> numero du membre
+        self._emprunts_par_membre = {}  # numero du membre -> {isbn: None}
+        self._echeances = {}  # date_retour -> {isbn: livre}
+        self._dates_echeance = []  # dates de retour ayant au moins un emprunt, triées
+        self._a_charger = None  # (instantane, livres, membres) pas encore matérialisé
+        self._reportes = set()  # ISBN de l'instantané déjà reportés (ou absents de l'instantané)
+        self._isbns_par_membre = None  # numero -> ISBN de l'instantané pas encore reportés
+
+    @classmethod
+    def charger(cls, chemin, livres, membres, quota=None, horloge=None):
+        """
+        Crée un système à partir d'un instantané écrit par `sauvegarder`.
+
+        `livres` associe les ISBN aux livres (un dictionnaire ou un Catalogue)
+        et `membres` les numéros aux membres. Le fichier est projeté en
+        mémoire et les emprunts sont reportés dans le système, les livres et
+        les membres à la demande : un emprunt ou un retour ne reporte que
+        l'enregistrement du livre concerné, une requête sur un membre ceux
+        de ce membre. Les requêtes par date de retour et `sauvegarder`
+        reportent tout, comme un appel à `materialiser`.
+        """
+        systeme = cls(quota, horloge)
+        systeme._a_charger = (InstantaneEmprunts(chemin), livres, membres)
+        return systeme
+
+    def sauvegarder(self, chemin):
+        """Écrit les emprunts en cours dans un instantané binaire."""
+        self.materialiser()
+        dates = {isbn: echeance for echeance, livres in self._echeances.items() for isbn in livres}
+        InstantaneEmprunts.ecrire(chemin, ((isbn, numero, dates.get(isbn))
+                                           for isbn, numero in self._emprunts_actifs.items()))
+
+    def materialiser(self):
+        """Reporte dans le système, les livres et les membres tous les emprunts de l'instantané chargé."""
+        if self._a_charger is None:
+            return
+        instantane = self._a_charger[0]
+        for isbn, numero, date_retour in instantane:
+            if isbn not in self._reportes:
+                self._reporter(isbn, numero, date_retour)
+        self._a_charger = None
+        self._reportes = set()
+        self._isbns_par_membre = None
+        instantane.fermer()
 
+    def _materialiser_livre(self, isbn):
+        """Reporte l'emprunt d'un livre depuis l'instantané chargé, s'il y figure."""
+        if self._a_charger is None or isbn in self._reportes:
+            return
+        emprunt = self._a_charger[0].chercher(isbn)
+        if emprunt is None:
+            self._reportes.add(isbn)
+        else:
+            self._reporter(isbn, *emprunt)
+
+    def _materialiser_membre(self, numero):
+        """Reporte depuis l'instantané chargé les emprunts d'un membre."""
+        if self._a_charger is None:
+            return
+        if self._isbns_par_membre is None:
+            # Un seul parcours de l'instantané, au premier besoin, pour l'index membre -> ISBN
+            self._isbns_par_membre = {}
+            for isbn, numero_emprunt, _ in self._a_charger[0]:
+                self._isbns_par_membre.setdefault(numero_emprunt, []).append(isbn)
+        for isbn in self._isbns_par_membre.pop(numero, ()):
+            self._materialiser_livre(isbn)
+
+    def _reporter(self, isbn, numero, date_retour):
+        """Reporte un emprunt de l'instantané dans le système, le livre et le membre."""
+        _, livres, membres = self._a_charger
+        livre, membre = livres.get(isbn), membres.get(numero)
+        if livre is None:
+            raise ValueError(f"L'instantané référence le livre {isbn}, inconnu de la bibliothèque")
+        if membre is None:
+            raise ValueError(f"L'instantané référence le membre {numero}, inconnu de la bibliothèque")
+        self._reportes.add(isbn)
+        livre.statut = "Emprunté"
+        livre.emprunteur = membre
+        livre.date_retour = date_retour
+        membre.ajouter_emprunt(livre)
+        self._enregistrer_emprunt(isbn, numero)
+        self._ajouter_echeance(livre)
 
     def emprunter_livre(self, livre, membre):
         """Enregistre l'emprunt d'un livre par un membre."""
+        self._materialiser_livre(livre.isbn)
+        self._verifier_quota(membre, 1)
         livre.emprunter(membre)
         membre.ajouter_emprunt(livre)
-        self._emprunts_actifs[livre.isbn] = membre.numero
+        self._enregistrer_emprunt(livre.isbn, membre.numero)
+        self._ajouter_echeance(livre)
 
     def retourner_livre(self, livre):
         """Enregistre le retour d'un livre."""
+        self._materialiser_livre(livre.isbn)
         if livre.emprunteur:
             livre.emprunteur.supprimer_emprunt(livre)
-            if livre.isbn in self._emprunts_actifs:
-                del self._emprunts_actifs[livre.isbn]
-        livre.retourner()
\ No newline at end of file
+            if self._liberer_emprunt(livre.isbn):
+                self._retirer_echeance(livre)
+        livre.retourner()
+
+    def nombre_emprunts(self, numero):
+        """Renvoie le nombre d'emprunts en cours d'un membre."""
+        self._materialiser_membre(numero)
+        return len(self._emprunts_par_membre.get(numero, ()))
+
+    def emprunts_membre(self, numero):
+        """Renvoie les ISBN des livres empruntés par un membre, dans l'ordre d'emprunt."""
+        self._materialiser_membre(numero)
+        return list(self._emprunts_par_membre.get(numero, ()))
+
+    def emprunteur(self, isbn):
+        """Renvoie le numéro du membre qui a emprunté un livre, ou None."""
+        if self._a_charger is not None and isbn not in self._reportes:
+            emprunt = self._a_charger[0].chercher(isbn)
+            return emprunt and emprunt[0]
+        return self._emprunts_actifs.get(isbn)
+
+    def emprunter_lot(self, livres, membre):
+        """
+        Enregistre l'emprunt d'un lot de livres par un membre.
+
+        La disponibilité de tous les livres est vérifiée avant tout emprunt :
+        si l'un d'eux est indisponible (ou présent deux fois), aucun n'est
+        emprunté.
+        """
+        livres = list(livres)
+        for livre in livres:
+            self._materialiser_livre(livre.isbn)
+        isbns = set()
+        for livre in livres:
+            if not livre.est_disponible() or livre.isbn in isbns:
+                raise ValueError(f"Le livre {livre.titre} n'est pas disponible")
+            isbns.add(livre.isbn)
+        self._verifier_quota(membre, len(livres))
+
+        for livre in livres:
+            livre.emprunter(membre)
+            membre.ajouter_emprunt(livre)
+            self._ajouter_echeance(livre)
+        self._enregistrer_emprunts([livre.isbn for livre in livres], membre.numero)
+
+    def retourner_lot(self, livres):
+        """
+        Enregistre le retour d'un lot de livres, éventuellement empruntés par
+        des membres différents.
+
+        Tous les livres doivent être empruntés, et présents une seule fois :
+        sinon, aucun n'est retourné.
+        """
+        livres = list(livres)
+        for livre in livres:
+            self._materialiser_livre(livre.isbn)
+        isbns = set()
+        for livre in livres:
+            if livre.emprunteur is None or livre.isbn in isbns:
+                raise ValueError(f"Le livre {livre.titre} n'est pas emprunté")
+            isbns.add(livre.isbn)
+
+        for livre in livres:
+            livre.emprunteur.supprimer_emprunt(livre)
+            if self._liberer_emprunt(livre.isbn):
+                self._retirer_echeance(livre)
+            livre.retourner()
+
+    def livres_en_retard(self, date=None):
+        """Renvoie les livres dont la date de retour est dépassée à une date (aujourd'hui par défaut)."""
+        self.materialiser()
+        if date is None:
+            date = self._horloge.aujourdhui()
+        fin = bisect.bisect_left(self._dates_echeance, date)
+        return [livre for echeance in self._dates_echeance[:fin]
+                for livre in self._echeances[echeance].values()]
+
+    def echeances_entre(self, debut, fin):
+        """Renvoie les livres à rendre entre deux dates incluses, par date de retour."""
+        self.materialiser()
+        premier = bisect.bisect_left(self._dates_echeance, debut)
+        dernier = bisect.bisect_right(self._dates_echeance, fin)
+        return [livre for echeance in self._dates_echeance[premier:dernier]
+                for livre in self._echeances[echeance].values()]
+
+    def _verifier_quota(self, membre, nombre):
+        """Vérifie qu'un membre peut emprunter `nombre` livres de plus."""
+        if self._quota is not None and self.nombre_emprunts(membre.numero) + nombre > self._quota:
+            raise ValueError(f"Le membre {membre.nom} a atteint son quota de {self._quota} emprunts")
+
+    def _enregistrer_emprunt(self, isbn, numero):
+        """Indexe un emprunt dans les deux sens (isbn -> numero, numero -> isbn)."""
+        self._emprunts_actifs[isbn] = numero
+        self._emprunts_par_membre.setdefault(numero, {})[isbn] = None
+
+    def _enregistrer_emprunts(self, isbns, numero):
+        """Indexe dans les deux sens un lot d'emprunts d'un même membre."""
+        self._emprunts_actifs.update(dict.fromkeys(isbns, numero))
+        self._emprunts_par_membre.setdefault(numero, {}).update(dict.fromkeys(isbns))
+
+    def _liberer_emprunt(self, isbn):
+        """Retire un emprunt des deux index ; renvoie False s'il n'y était pas."""
+        numero = self._emprunts_actifs.pop(isbn, None)
+        if numero is None:
+            return False
+        isbns = self._emprunts_par_membre[numero]
+        del isbns[isbn]
+        if not isbns:
+            del self._emprunts_par_membre[numero]
+        return True
+
+    def _ajouter_echeance(self, livre):
+        """Indexe un emprunt par sa date de retour."""
+        echeance = livre.date_retour
+        if echeance not in self._echeances:
+            self._echeances[echeance] = {}
+            bisect.insort(self._dates_echeance, echeance)
+        self._echeances[echeance][livre.isbn] = livre
+
+    def _retirer_echeance(self, livre):
+        """Retire un emprunt de l'index des dates de retour."""
+        livres = self._echeances.get(livre.date_retour)
+        if livres is None or livres.pop(livre.isbn, None) is None:
+            return
+        if len(livres) == 0:
+            del self._echeances[livre.date_retour]
+            del self._dates_echeance[bisect.bisect_left(self._dates_echeance, livre.date_retour)]
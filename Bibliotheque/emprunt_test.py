@@ -0,0 +1,285 @@
+# emprunt_test.py
+import datetime
+import os
+import tempfile
+import unittest
+import weakref
+
+from .catalogue import Catalogue
+from .emprunt import SystemeEmprunt
+from .horloge import Horloge, HorlogeFigee
+from .livre import Livre
+from .membre import Membre
+
+
+class SystemeEmpruntTestCase(unittest.TestCase):
+    """
+    Test class for SystemeEmprunt
+    """
+
+    def setUp(self):
+        """
+        Sets up a loan system, a member and a few books.
+        """
+        self.systeme = SystemeEmprunt()
+        self.membre = Membre("Marie Curie", "M001")
+        self.livres = [Livre(f"Livre {n}", f"978-0-00-00000{n}-0") for n in range(3)]
+        self.echeance = datetime.date.today() + datetime.timedelta(days=21)
+
+    def test_livres_en_retard(self):
+        """
+        Test that overdue books are those whose due date has passed.
+        """
+        for livre in self.livres:
+            self.systeme.emprunter_livre(livre, self.membre)
+
+        self.assertEqual(self.systeme.livres_en_retard(), [])
+        self.assertEqual(self.systeme.livres_en_retard(self.echeance), [])
+        lendemain = self.echeance + datetime.timedelta(days=1)
+        self.assertEqual(self.systeme.livres_en_retard(lendemain), self.livres)
+
+        self.systeme.retourner_livre(self.livres[1])
+        self.assertEqual(self.systeme.livres_en_retard(lendemain), [self.livres[0], self.livres[2]])
+
+    def test_livre_reference_faible(self):
+        """
+        Test that books can be weakly referenced despite their slots.
+        """
+        livre = Livre("Livre", "978-0-00-000000-0")
+        reference = weakref.ref(livre)
+        self.assertIs(reference(), livre)
+        del livre
+        self.assertIsNone(reference())
+
+    def test_livres_en_retard_selon_horloge(self):
+        """
+        Test that overdue books default to the date of the injected clock.
+        """
+        horloge = HorlogeFigee(datetime.datetime(2030, 1, 15, 10, 0))
+        systeme = SystemeEmprunt(horloge=horloge)
+        livre = Livre("Livre", "978-0-00-000000-0", horloge)
+        systeme.emprunter_livre(livre, self.membre)
+
+        horloge.avancer(datetime.timedelta(days=21))
+        self.assertEqual(systeme.livres_en_retard(), [])
+        horloge.avancer(datetime.timedelta(days=1))
+        self.assertEqual(systeme.livres_en_retard(), [livre])
+
+    def test_echeances_entre(self):
+        """
+        Test that due dates are found within an inclusive range.
+        """
+        self.systeme.emprunter_livre(self.livres[0], self.membre)
+        self.assertEqual(self.systeme.echeances_entre(self.echeance, self.echeance), [self.livres[0]])
+        veille = self.echeance - datetime.timedelta(days=1)
+        self.assertEqual(self.systeme.echeances_entre(veille - datetime.timedelta(days=7), veille), [])
+
+        self.systeme.retourner_livre(self.livres[0])
+        self.assertEqual(self.systeme.echeances_entre(veille, self.echeance), [])
+
+    def test_emprunter_lot(self):
+        """
+        Test that a batch is lent entirely or not at all.
+        """
+        self.systeme.emprunter_livre(self.livres[2], Membre("Pierre Curie", "M002"))
+        with self.assertRaises(ValueError):
+            self.systeme.emprunter_lot(self.livres, self.membre)
+        with self.assertRaises(ValueError):
+            self.systeme.emprunter_lot([self.livres[0], self.livres[0]], self.membre)
+        self.assertTrue(self.livres[0].est_disponible())
+        self.assertEqual(list(self.membre.emprunts), [])
+
+        self.systeme.emprunter_lot(self.livres[:2], self.membre)
+        self.assertEqual(list(self.membre.emprunts), self.livres[:2])
+        self.assertEqual(self.systeme.echeances_entre(self.echeance, self.echeance),
+                         [self.livres[2], self.livres[0], self.livres[1]])
+
+    def test_retourner_lot(self):
+        """
+        Test that a batch of returns checks every book before returning any.
+        """
+        self.systeme.emprunter_lot(self.livres[:2], self.membre)
+        with self.assertRaises(ValueError):
+            self.systeme.retourner_lot(self.livres)
+        with self.assertRaises(ValueError):
+            self.systeme.retourner_lot([self.livres[1], self.livres[0], self.livres[0]])
+        self.assertEqual(len(self.membre.emprunts), 2)
+        self.assertEqual(self.systeme.nombre_emprunts(self.membre.numero), 2)
+
+        self.systeme.retourner_lot(self.livres[:2])
+        self.assertTrue(all(livre.est_disponible() for livre in self.livres))
+        self.assertEqual(list(self.membre.emprunts), [])
+        self.assertEqual(self.systeme.echeances_entre(self.echeance, self.echeance), [])
+
+    def test_emprunts_par_membre(self):
+        """
+        Test the member -> loans index and the per-member quota.
+        """
+        systeme = SystemeEmprunt(quota=2)
+        systeme.emprunter_livre(self.livres[0], self.membre)
+        with self.assertRaises(ValueError):
+            systeme.emprunter_lot(self.livres[1:], self.membre)
+        systeme.emprunter_livre(self.livres[2], self.membre)
+        with self.assertRaises(ValueError):
+            systeme.emprunter_livre(self.livres[1], self.membre)
+        self.assertTrue(self.livres[1].est_disponible())
+
+        self.assertEqual(systeme.nombre_emprunts("M001"), 2)
+        self.assertEqual(systeme.emprunts_membre("M001"), [self.livres[0].isbn, self.livres[2].isbn])
+        self.assertEqual(systeme.emprunteur(self.livres[2].isbn), "M001")
+
+        systeme.retourner_lot([self.livres[0]])
+        systeme.retourner_livre(self.livres[2])
+        self.assertEqual(systeme.nombre_emprunts("M001"), 0)
+        self.assertEqual(systeme.emprunts_membre("M001"), [])
+        self.assertIsNone(systeme.emprunteur(self.livres[2].isbn))
+
+    def test_instantane(self):
+        """
+        Test that a snapshot is queried lazily, then restores books and members.
+        """
+        self.systeme.emprunter_lot(self.livres[1:], self.membre)
+        with tempfile.TemporaryDirectory() as dossier:
+            chemin = os.path.join(dossier, "emprunts.bin")
+            self.systeme.sauvegarder(chemin)
+
+            livres = {n: Livre(f"Livre {n}", f"978-0-00-00000{n}-0") for n in range(3)}
+            membre = Membre("Marie Curie", "M001")
+            systeme = SystemeEmprunt.charger(chemin, {livre.isbn: livre for livre in livres.values()},
+                                             {"M001": membre})
+            self.assertEqual(systeme.emprunteur(livres[2].isbn), "M001")
+            self.assertIsNone(systeme.emprunteur(livres[0].isbn))
+            self.assertIsNone(systeme.emprunteur("978-0-00-000009-0"))
+            self.assertTrue(livres[1].est_disponible())
+
+            self.assertEqual(systeme.emprunts_membre("M001"), [livres[1].isbn, livres[2].isbn])
+            self.assertEqual(livres[1].statut, "Emprunté")
+            self.assertEqual(livres[1].date_retour, self.echeance)
+            self.assertEqual(list(membre.emprunts), [livres[1], livres[2]])
+            self.assertEqual(systeme.echeances_entre(self.echeance, self.echeance), [livres[1], livres[2]])
+
+            systeme.retourner_livre(livres[1])
+            self.assertEqual(systeme.nombre_emprunts("M001"), 1)
+
+    def test_instantane_par_enregistrement(self):
+        """
+        Test that checkouts and returns only load the snapshot records they touch.
+        """
+        self.systeme.emprunter_lot(self.livres[1:], self.membre)
+        with tempfile.TemporaryDirectory() as dossier:
+            chemin = os.path.join(dossier, "emprunts.bin")
+            self.systeme.sauvegarder(chemin)
+            self.assertEqual(os.listdir(dossier), ["emprunts.bin"])
+
+            livres = [Livre(f"Livre {n}", f"978-0-00-00000{n}-0") for n in range(3)]
+            membre = Membre("Marie Curie", "M001")
+            systeme = SystemeEmprunt.charger(chemin, {livre.isbn: livre for livre in livres}, {"M001": membre})
+            with self.assertRaises(ValueError):
+                systeme.emprunter_livre(livres[1], membre)
+            systeme.retourner_livre(livres[1])
+            self.assertTrue(livres[1].est_disponible())
+            self.assertEqual(livres[2].statut, "Disponible")
+            self.assertIsNone(systeme.emprunteur(livres[1].isbn))
+            self.assertEqual(systeme.emprunts_membre("M001"), [livres[2].isbn])
+
+            inconnu = SystemeEmprunt.charger(chemin, {}, {"M001": membre})
+            with self.assertRaises(ValueError):
+                inconnu.materialiser()
+
+
+class CatalogueTestCase(unittest.TestCase):
+    """
+    Test class for Catalogue
+    """
+
+    def setUp(self):
+        """
+        Sets up a catalogue holding enough books to grow its index.
+        """
+        self.catalogue = Catalogue()
+        for n in range(100):
+            self.catalogue.ajouter(f"Livre {n}", f"978-0-00-{n:06d}-0")
+
+    def test_consultation(self):
+        """
+        Test that books are found by ISBN through views behaving like Livre.
+        """
+        livre = self.catalogue["978-0-00-000042-0"]
+        self.assertEqual(len(self.catalogue), 100)
+        self.assertEqual(livre.titre, "Livre 42")
+        self.assertEqual(livre.statut, "Disponible")
+        self.assertIsNone(livre.date_retour)
+        self.assertEqual(livre, self.catalogue.get("978-0-00-000042-0"))
+        self.assertNotIn("978-0-00-999999-0", self.catalogue)
+        self.assertIsNone(self.catalogue.get("978-0-00-999999-0"))
+        with self.assertRaises(ValueError):
+            self.catalogue.ajouter("Doublon", "978-0-00-000042-0")
+
+    def test_emprunt_via_systeme(self):
+        """
+        Test that catalogue views can be lent and returned by SystemeEmprunt.
+        """
+        systeme = SystemeEmprunt()
+        membre = Membre("Marie Curie", "M001")
+        livre = self.catalogue["978-0-00-000007-0"]
+
+        systeme.emprunter_livre(livre, membre)
+        vue = self.catalogue["978-0-00-000007-0"]
+        self.assertEqual(vue.statut, "Emprunté")
+        self.assertIs(vue.emprunteur, membre)
+        self.assertEqual(vue.date_retour, datetime.date.today() + datetime.timedelta(days=21))
+        self.assertIn(vue, membre.emprunts)
+        with self.assertRaises(ValueError):
+            systeme.emprunter_livre(vue, membre)
+
+        systeme.retourner_livre(vue)
+        self.assertTrue(livre.est_disponible())
+        self.assertIsNone(livre.emprunteur)
+        self.assertEqual(list(membre.emprunts), [])
+
+
+class HorlogeTestCase(unittest.TestCase):
+    """
+    Test class for Horloge
+    """
+
+    def test_date_du_jour(self):
+        """
+        Test that the cached date and due dates follow the system date.
+        """
+        horloge = Horloge()
+        aujourdhui = datetime.date.today()
+        self.assertEqual(horloge.aujourdhui(), aujourdhui)
+        self.assertEqual(horloge.echeance(21), aujourdhui + datetime.timedelta(days=21))
+        self.assertIs(horloge.echeance(21), horloge.echeance(21))
+
+    def test_horloge_figee(self):
+        """
+        Test that a frozen clock drives the due dates of books.
+        """
+        horloge = HorlogeFigee(datetime.datetime(2030, 1, 15, 10, 0))
+        catalogue = Catalogue(horloge)
+        livre = catalogue.ajouter("Livre", "978-0-00-000000-0")
+        livre.emprunter(Membre("Marie Curie", "M001"))
+        self.assertEqual(livre.date_retour, datetime.date(2030, 2, 5))
+
+        horloge.avancer(datetime.timedelta(days=1))
+        self.assertEqual(horloge.aujourdhui(), datetime.date(2030, 1, 16))
+        self.assertEqual(horloge.echeance(7), datetime.date(2030, 1, 23))
+
+    def test_horloge_figee_livre(self):
+        """
+        Test that a frozen clock given to a book drives its due date.
+        """
+        horloge = HorlogeFigee(datetime.datetime(2030, 1, 15, 10, 0))
+        livre = Livre("Livre", "978-0-00-000000-0", horloge)
+        livre.emprunter(Membre("Marie Curie", "M001"))
+        self.assertEqual(livre.date_retour, datetime.date(2030, 2, 5))
+
+        autre = Livre("Autre", "978-0-00-000001-0")
+        autre.emprunter(Membre("Marie Curie", "M001"))
+        self.assertEqual(autre.date_retour, datetime.date.today() + datetime.timedelta(days=21))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+# generateur_code.py
+import itertools
+import random
+import string
+import threading
+
+_ALPHABET = string.ascii_uppercase + string.digits
+_PAIRES = [a + b for a in _ALPHABET for b in _ALPHABET]  # 36² couples de caractères
+_NB_PAIRES = len(_PAIRES)
+_DEMI = _NB_PAIRES ** 2  # nombre de valeurs codées sur 4 caractères
+
+
+class GenerateurCodeReservation:
+    """
+    Générateur de codes de réservation uniques, de la forme RES + 8 caractères.
+
+    Chaque code provient d'un compteur passé dans une permutation de l'espace
+    des 36⁸ codes (réseau de Feistel à clés aléatoires). Deux appels ne
+    peuvent donc jamais produire le même code, sans tirage ni nouvel essai,
+    tout en gardant des codes d'apparence aléatoire.
+    """
+
+    TOURS = 3
+
+    def __init__(self, graine=None, depart=0):
+        """
+        Initialise le générateur. Une même graine et une même position de
+        départ reproduisent la même suite de codes.
+        """
+        alea = random.Random(graine)
+        self._cles = [(alea.randrange(1, _DEMI), alea.randrange(_DEMI)) for _ in range(self.TOURS)]
+        self._compteur = itertools.count(depart)
+
+    def __call__(self):
+        """Renvoie le code suivant."""
+        return self.code(next(self._compteur))
+
+    def code(self, position):
+        """Renvoie le code correspondant à une position du compteur."""
+        if position >= _DEMI * _DEMI:
+            raise ValueError("Tous les codes de réservation ont été attribués")
+
+        gauche, droite = divmod(position, _DEMI)
+        for multiplicateur, decalage in self._cles:
+            melange = (droite * multiplicateur + decalage) % _DEMI
+            gauche, droite = droite, (gauche + (melange ^ (melange >> 7))) % _DEMI
+
+        return ('RES' + _PAIRES[gauche // _NB_PAIRES] + _PAIRES[gauche % _NB_PAIRES]
+                + _PAIRES[droite // _NB_PAIRES] + _PAIRES[droite % _NB_PAIRES])
+
+
+class GenerateurCodeStocke(GenerateurCodeReservation):
+    """
+    Générateur dont la graine et les positions sont tenues par un stockage
+    de réservations (voir stockage_reservation).
+
+    Les positions sont réservées dans le stockage par blocs de TAILLE_BLOC :
+    un redémarrage reprend après le dernier bloc réservé, et n'abandonne
+    donc au plus qu'un bloc de codes.
+    """
+
+    TAILLE_BLOC = 1024
+
+    def __init__(self, stockage):
+        super().__init__(stockage.graine_codes())
+        self._stockage = stockage
+        self._verrou = threading.Lock()  # les salles peuvent réserver en parallèle
+        self._position = self._fin_bloc = 0
+
+    def __call__(self):
+        with self._verrou:
+            if self._position == self._fin_bloc:
+                self._position = self._stockage.reserver_positions(self.TAILLE_BLOC)
+                self._fin_bloc = self._position + self.TAILLE_BLOC
+            position = self._position
+            self._position += 1
+        return self.code(position)
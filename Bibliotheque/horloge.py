@@ -0,0 +1,70 @@
+# horloge.py
+import datetime
+import time
+
+
+class Horloge:
+    """
+    Horloge du système, injectable dans les classes qui datent leurs opérations.
+
+    La date du jour et les échéances qui en découlent sont mises en cache
+    jusqu'à minuit : sur un lot d'emprunts, chaque appel se réduit à une
+    lecture de time.time() et à une comparaison.
+    """
+
+    def __init__(self):
+        self._jour = (None, {})  # (date du jour, {nombre de jours: date d'échéance})
+        self._minuit_suivant = 0.0  # instant (time.time) où le cache expire
+
+    def maintenant(self):
+        """Renvoie la date et l'heure courantes."""
+        return datetime.datetime.now()
+
+    def aujourdhui(self):
+        """Renvoie la date du jour."""
+        return self._cache_du_jour()[0]
+
+    def echeance(self, jours):
+        """Renvoie la date située `jours` jours après aujourd'hui."""
+        aujourdhui, echeances = self._cache_du_jour()
+        echeance = echeances.get(jours)
+        if echeance is None:
+            echeance = echeances[jours] = aujourdhui + datetime.timedelta(days=jours)
+        return echeance
+
+    def _cache_du_jour(self):
+        """Renvoie (date du jour, échéances du jour), recalculés après minuit."""
+        if time.time() >= self._minuit_suivant:
+            # Date et échéances sont remplacées ensemble, en une seule affectation
+            jour = datetime.date.today()
+            self._jour = (jour, {})
+            lendemain = datetime.datetime.combine(jour + datetime.timedelta(days=1), datetime.time(0))
+            self._minuit_suivant = lendemain.timestamp()
+        return self._jour
+
+
+class HorlogeFigee(Horloge):
+    """
+    Horloge arrêtée sur un instant donné, avancée à la main (pour les tests).
+    """
+
+    def __init__(self, instant):
+        super().__init__()
+        self._instant = instant
+
+    def maintenant(self):
+        return self._instant
+
+    def aujourdhui(self):
+        return self._instant.date()
+
+    def echeance(self, jours):
+        return self._instant.date() + datetime.timedelta(days=jours)
+
+    def avancer(self, duree):
+        """Avance l'horloge d'une durée (un timedelta)."""
+        self._instant += duree
+
+
+# Horloge partagée par défaut, pour que toutes les classes profitent du même cache
+HORLOGE = Horloge()
@@ -0,0 +1,115 @@
+# instantane_emprunt.py
+import bisect
+import datetime
+import mmap
+import os
+import struct
+
+_MAGIE = b"EMPR"
+_VERSION = 1
+# Entête : magie, version, largeur des ISBN, largeur des numéros de membre, nombre d'emprunts
+_ENTETE = struct.Struct("<4sHHHI")
+_SANS_DATE = 0
+
+
+class InstantaneEmprunts:
+    """
+    Instantané binaire des emprunts en cours, lu par projection en mémoire.
+
+    Le fichier contient un entête puis un enregistrement de largeur fixe par
+    emprunt : ISBN et numéro du membre (UTF-8 complétés par des octets nuls),
+    puis date de retour en ordinal. Les enregistrements sont triés par ISBN :
+    un emprunt se retrouve par recherche dichotomique, sans lire le reste du
+    fichier.
+    """
+
+    def __init__(self, chemin):
+        """Projette en mémoire l'instantané situé à `chemin`."""
+        with open(chemin, "rb") as fichier:
+            self._memoire = mmap.mmap(fichier.fileno(), 0, access=mmap.ACCESS_READ)
+        magie, version, largeur_isbn, largeur_numero, nombre = _ENTETE.unpack_from(self._memoire)
+        if magie != _MAGIE or version != _VERSION:
+            raise ValueError(f"{chemin} n'est pas un instantané d'emprunts")
+        self._largeur_isbn = largeur_isbn
+        self._enregistrement = struct.Struct(f"<{largeur_isbn}s{largeur_numero}si")
+        self._nombre = nombre
+
+    @staticmethod
+    def ecrire(chemin, emprunts):
+        """
+        Écrit un instantané à partir d'un itérable de (isbn, numero, date_retour).
+
+        Le fichier est écrit à côté puis renommé : un arrêt en cours d'écriture
+        laisse l'instantané précédent intact.
+        """
+        lignes = sorted((isbn.encode(), numero.encode(), _SANS_DATE if date is None else date.toordinal())
+                        for isbn, numero, date in emprunts)
+        largeur_isbn = max((len(isbn) for isbn, _, _ in lignes), default=1)
+        largeur_numero = max((len(numero) for _, numero, _ in lignes), default=1)
+        enregistrement = struct.Struct(f"<{largeur_isbn}s{largeur_numero}si")
+
+        temporaire = f"{chemin}.tmp"
+        with open(temporaire, "wb") as fichier:
+            fichier.write(_ENTETE.pack(_MAGIE, _VERSION, largeur_isbn, largeur_numero, len(lignes)))
+            fichier.write(b"".join(enregistrement.pack(*ligne) for ligne in lignes))
+            fichier.flush()
+            os.fsync(fichier.fileno())
+        os.replace(temporaire, chemin)
+
+    def __len__(self):
+        return self._nombre
+
+    def __iter__(self):
+        """Parcourt les emprunts (isbn, numero, date_retour), par ISBN croissant."""
+        donnees = memoryview(self._memoire)[_ENTETE.size:_ENTETE.size + self._nombre * self._enregistrement.size]
+        dates = {_SANS_DATE: None}  # ordinal -> date, peu de dates différentes
+        try:
+            for isbn, numero, ordinal in self._enregistrement.iter_unpack(donnees):
+                date = dates.get(ordinal)
+                if date is None and ordinal != _SANS_DATE:
+                    date = dates[ordinal] = datetime.date.fromordinal(ordinal)
+                yield isbn.rstrip(b"\0").decode(), numero.rstrip(b"\0").decode(), date
+        finally:
+            donnees.release()
+
+    def chercher(self, isbn):
+        """Renvoie (numero, date_retour) de l'emprunt d'un livre, ou None."""
+        cle = isbn.encode()
+        if len(cle) > self._largeur_isbn:
+            return None
+        cle = cle.ljust(self._largeur_isbn, b"\0")
+        position = bisect.bisect_left(_Cles(self), cle)
+        if position == self._nombre or self._cle(position) != cle:
+            return None
+        _, numero, date = self._decoder(*self._enregistrement.unpack_from(self._memoire, self._decalage(position)))
+        return numero, date
+
+    def fermer(self):
+        """Libère la projection en mémoire."""
+        self._memoire.close()
+
+    def _decalage(self, position):
+        return _ENTETE.size + position * self._enregistrement.size
+
+    def _cle(self, position):
+        """ISBN encodé (complété par des octets nuls) de l'enregistrement à une position."""
+        debut = self._decalage(position)
+        return self._memoire[debut:debut + self._largeur_isbn]
+
+    @staticmethod
+    def _decoder(isbn, numero, ordinal):
+        date = None if ordinal == _SANS_DATE else datetime.date.fromordinal(ordinal)
+        return isbn.rstrip(b"\0").decode(), numero.rstrip(b"\0").decode(), date
+
+
+class _Cles:
+    """Séquence des ISBN encodés d'un instantané, pour la recherche dichotomique."""
+
+    def __init__(self, instantane):
+        self._instantane = instantane
+
+    def __len__(self):
+        return len(self._instantane)
+
+    def __getitem__(self, position):
+        return self._instantane._cle(position)
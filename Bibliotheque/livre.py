@@ -1,18 +1,29 @@
 # bibliotheque/livre.py
+from .horloge import HORLOGE
+
+# Durée d'un emprunt, en jours
+DUREE_EMPRUNT = 21
+
+
 class Livre:
     """
     Classe représentant un livre dans une bibliothèque.
     """
 
-    def __init__(self, titre, isbn):
+    # '__weakref__' garde les livres référençables faiblement (caches, index)
+    __slots__ = ('_titre', '_isbn', '_statut', '_emprunteur', '_date_retour', '_horloge', '__weakref__')
+
+    def __init__(self, titre, isbn, horloge=None):
         """
-        Initialise un nouveau livre avec un titre et un ISBN.
+        Initialise un nouveau livre avec un titre et un ISBN. `horloge`
+        (voir horloge) donne les dates de retour.
         """
         self._titre = titre
         self._isbn = isbn
         self._statut = "Disponible"
         self._emprunteur = None
         self._date_retour = None
+        self._horloge = horloge or HORLOGE
 
     @property
     def titre(self):
@@ -61,8 +72,7 @@ class Livre:
 
         self._statut = "Emprunté"
         self._emprunteur = membre
-        import datetime
-        self._date_retour = datetime.date.today() + datetime.timedelta(days=21)
+        self._date_retour = self._horloge.echeance(DUREE_EMPRUNT)
         return True
 
     def retourner(self):
@@ -5,7 +5,7 @@ class Membre:
     def __init__(self, nom, numero):
         self._nom = nom
         self._numero = numero
-        self._emprunts = []
+        self._emprunts = {}  # Livres empruntés, dans l'ordre d'emprunt
 
     @property
     def nom(self):
@@ -17,11 +17,11 @@ class Membre:
 
     @property
     def emprunts(self):
-        return self._emprunts
+        """Vue en lecture seule des livres empruntés, sans copie."""
+        return self._emprunts.keys()
 
     def ajouter_emprunt(self, livre):
-        self._emprunts.append(livre)
+        self._emprunts[livre] = None
 
     def supprimer_emprunt(self, livre):
-        if livre in self._emprunts:
-            self._emprunts.remove(livre)
\ No newline at end of file
+        self._emprunts.pop(livre, None)
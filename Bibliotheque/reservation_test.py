@@ -0,0 +1,491 @@
+# reservation_test.py
+import datetime
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from .archive_reservation import ArchiveReservations
+from .generateur_code import GenerateurCodeReservation, GenerateurCodeStocke
+from .horloge import HorlogeFigee
+from .salle import Salle
+from .stockage_reservation import StockageSQLite
+from .systeme_reservation import SystemeReservation
+from .utilisateur import Utilisateur
+
+
+class SalleTestCase(unittest.TestCase):
+    """
+    Test class for Salle reservations
+    """
+
+    def setUp(self):
+        """
+        Sets up a room and a fixed day used by every test.
+        """
+        self.salle = Salle("S101", 4)
+        self.jour = datetime.date(2030, 1, 15)
+
+    def creneau(self, heure_debut, heure_fin):
+        """
+        Builds a (debut, fin) pair on the test day.
+        """
+        return (datetime.datetime.combine(self.jour, datetime.time(heure_debut)),
+                datetime.datetime.combine(self.jour, datetime.time(heure_fin)))
+
+    def test_chevauchement(self):
+        """
+        Test that overlapping and touching slots are refused.
+        """
+        self.salle.ajouter_reservation(*self.creneau(10, 12), None, "RES1")
+        self.assertFalse(self.salle.est_disponible_pour_creneau(*self.creneau(11, 13)))
+        self.assertFalse(self.salle.est_disponible_pour_creneau(*self.creneau(9, 10)))
+        self.assertFalse(self.salle.est_disponible_pour_creneau(*self.creneau(12, 14)))
+        self.assertFalse(self.salle.est_disponible_pour_creneau(*self.creneau(9, 13)))
+        self.assertTrue(self.salle.est_disponible_pour_creneau(*self.creneau(13, 15)))
+        self.assertTrue(self.salle.est_disponible_pour_creneau(*self.creneau(8, 9)))
+
+    def test_ajout_dans_le_desordre(self):
+        """
+        Test that slots inserted out of order are all taken into account.
+        """
+        self.salle.ajouter_reservation(*self.creneau(15, 16), None, "RES1")
+        self.salle.ajouter_reservation(*self.creneau(9, 10), None, "RES2")
+        self.salle.ajouter_reservation(*self.creneau(12, 13), None, "RES3")
+        with self.assertRaises(ValueError):
+            self.salle.ajouter_reservation(*self.creneau(12, 14), None, "RES4")
+        self.assertTrue(self.salle.est_disponible_pour_creneau(*self.creneau(11, 11)))
+
+    def test_suppression_libere_le_creneau(self):
+        """
+        Test that removing a reservation frees its slot and the day.
+        """
+        self.salle.ajouter_reservation(*self.creneau(10, 12), None, "RES1")
+        self.salle.ajouter_reservation(*self.creneau(14, 16), None, "RES2")
+        self.assertTrue(self.salle.supprimer_reservation("RES1"))
+        self.assertTrue(self.salle.est_disponible_pour_creneau(*self.creneau(10, 12)))
+        self.assertFalse(self.salle.est_disponible_pour_creneau(*self.creneau(15, 17)))
+        self.assertTrue(self.salle.supprimer_reservation("RES2"))
+        self.assertTrue(self.salle.est_disponible(self.jour))
+        self.assertFalse(self.salle.supprimer_reservation("RES2"))
+
+    def test_trouver_reservation_par_code(self):
+        """
+        Test that a reservation is found by its code among many days.
+        """
+        for jour in range(1, 29):
+            debut = datetime.datetime(2030, 2, jour, 10)
+            self.salle.ajouter_reservation(debut, debut + datetime.timedelta(hours=1), None, f"RES{jour}")
+        details = self.salle.trouver_reservation("RES17")
+        self.assertEqual(details['date'], datetime.date(2030, 2, 17))
+        self.assertEqual(details['debut'], datetime.datetime(2030, 2, 17, 10))
+        self.assertIsNone(self.salle.trouver_reservation("RES99"))
+
+    def test_remplacement_de_creneau(self):
+        """
+        Test that replacing a slot drops the code it previously held.
+        """
+        self.salle.ajouter_reservation(*self.creneau(9, 11), None, "RES1")
+        self.salle._inserer_reservation(*self.creneau(9, 11), None, "RES12345")
+        self.assertIsNone(self.salle.trouver_reservation("RES1"))
+        self.assertFalse(self.salle.supprimer_reservation("RES1"))
+        self.assertTrue(self.salle.supprimer_reservation("RES12345"))
+        self.assertTrue(self.salle.est_disponible(self.jour))
+
+
+class GenerateurCodeReservationTestCase(unittest.TestCase):
+    """
+    Test class for GenerateurCodeReservation
+    """
+
+    def test_codes_uniques(self):
+        """
+        Test that consecutive codes are distinct and well formed.
+        """
+        generateur = GenerateurCodeReservation()
+        codes = [generateur() for _ in range(50000)]
+        self.assertEqual(len(set(codes)), len(codes))
+        for code in codes[:100]:
+            self.assertRegex(code, r"^RES[A-Z0-9]{8}$")
+
+    def test_graine_reproductible(self):
+        """
+        Test that a seed and a start position replay the same codes.
+        """
+        premier = GenerateurCodeReservation(graine=42)
+        codes = [premier() for _ in range(10)]
+        self.assertEqual(GenerateurCodeReservation(graine=42, depart=5)(), codes[5])
+
+
+class SystemeReservationTestCase(unittest.TestCase):
+    """
+    Test class for SystemeReservation
+    """
+
+    def setUp(self):
+        """
+        Sets up a reservation system with two rooms and one user.
+        """
+        self.systeme = SystemeReservation()
+        self.s101 = Salle("S101", 4)
+        self.s102 = Salle("S102", 8)
+        self.systeme.ajouter_salle(self.s101)
+        self.systeme.ajouter_salle(self.s102)
+        self.marie = Utilisateur("Marie Curie", "MC001")
+        self.demain = datetime.date.today() + datetime.timedelta(days=1)
+
+    def creneau(self, heure_debut, heure_fin, jour=None):
+        """
+        Builds a (debut, fin) pair, tomorrow by default.
+        """
+        jour = jour or self.demain
+        return (datetime.datetime.combine(jour, datetime.time(heure_debut)),
+                datetime.datetime.combine(jour, datetime.time(heure_fin)))
+
+    def test_code_deja_attribue(self):
+        """
+        Test that a generated code already in use is skipped.
+        """
+        systeme = SystemeReservation(generateur_code=iter(["RES00000001", "RES00000002"]).__next__)
+        systeme.ajouter_salle(self.s101)
+        systeme.forcer_code_reservation(self.s101, self.marie, "RES00000001")
+        code = systeme.reserver_salle(self.s101, self.marie, *self.creneau(14, 15))
+        self.assertEqual(code, "RES00000002")
+        self.assertEqual(len(list(self.s101.creneaux_occupes(self.demain))), 2)
+
+    def test_reservations_salle_par_date(self):
+        """
+        Test that a room listing only contains that room's bookings for the day.
+        """
+        apres_demain = self.demain + datetime.timedelta(days=1)
+        code = self.systeme.reserver_salle(self.s101, self.marie, *self.creneau(10, 12))
+        self.systeme.reserver_salle(self.s101, self.marie, *self.creneau(10, 12, apres_demain))
+        self.systeme.reserver_salle(self.s102, self.marie, *self.creneau(10, 12))
+
+        reservations = self.systeme.get_reservations_salle("S101", self.demain)
+        self.assertEqual([r['code'] for r in reservations], [code])
+
+        self.systeme.annuler_reservation(code)
+        self.assertEqual(self.systeme.get_reservations_salle("S101", self.demain), [])
+
+    def test_planning(self):
+        """
+        Test that the planning lists every room for the day.
+        """
+        code = self.systeme.reserver_salle(self.s102, self.marie, *self.creneau(14, 16))
+        planning = self.systeme.get_planning(self.demain)
+        self.assertEqual(planning["S101"], [])
+        self.assertEqual([r['code'] for r in planning["S102"]], [code])
+
+    def test_reservation_en_masse(self):
+        """
+        Test that a batch books every slot and returns codes in order.
+        """
+        codes = self.systeme.reserver_salles_en_masse([
+            (self.s101, self.marie, *self.creneau(14, 15)),
+            (self.s101, self.marie, *self.creneau(10, 11)),
+            (self.s102, self.marie, *self.creneau(10, 11)),
+        ])
+        self.assertEqual(len(codes), 3)
+        self.assertEqual(self.systeme.get_reservations_salle("S101", self.demain)[0]['code'], codes[0])
+        self.assertFalse(self.s101.est_disponible_pour_creneau(*self.creneau(10, 11)))
+
+    def test_reservation_en_masse_atomique(self):
+        """
+        Test that a conflict anywhere in the batch leaves the system untouched.
+        """
+        self.systeme.reserver_salle(self.s102, self.marie, *self.creneau(16, 17))
+        conflits = [
+            [(self.s101, self.marie, *self.creneau(10, 12)),
+             (self.s101, self.marie, *self.creneau(11, 13))],
+            [(self.s101, self.marie, *self.creneau(10, 12)),
+             (self.s102, self.marie, *self.creneau(15, 17))],
+        ]
+        for demandes in conflits:
+            with self.assertRaises(ValueError):
+                self.systeme.reserver_salles_en_masse(demandes)
+        self.assertTrue(self.s101.est_disponible(self.demain))
+        self.assertEqual(len(self.marie.reservations), 1)
+
+    def test_chercher_creneaux_libres(self):
+        """
+        Test that free slots skip bookings, small rooms and respect the window.
+        """
+        self.systeme.reserver_salle(self.s102, self.marie, *self.creneau(13, 15))
+        creneaux = list(self.systeme.chercher_creneaux_libres(
+            datetime.timedelta(hours=2), self.demain, capacite_min=5, fenetre=(12, 18)))
+
+        self.assertEqual([c['salle'] for c in creneaux], [self.s102])
+        debut, fin = creneaux[0]['debut'], creneaux[0]['fin']
+        self.assertEqual(debut, self.creneau(15, 17)[0] + datetime.timedelta(minutes=1))
+        self.assertEqual(fin - debut, datetime.timedelta(hours=2))
+        self.systeme.reserver_salle(self.s102, self.marie, debut, fin)
+
+    def test_chercher_creneaux_libres_nombre(self):
+        """
+        Test that the search stops after the requested number of slots.
+        """
+        creneaux = self.systeme.chercher_creneaux_libres(
+            datetime.timedelta(hours=1), self.demain, nombre=1)
+        self.assertEqual([c['salle'] for c in creneaux], [self.s101])
+
+    def test_mode_concurrent_sans_double_reservation(self):
+        """
+        Test that concurrent bookings of overlapping slots never double-book.
+        """
+        systeme = SystemeReservation(concurrent=True)
+        systeme.ajouter_salle(self.s101)
+        codes = []
+
+        def reserver(numero):
+            utilisateur = Utilisateur(f"Utilisateur {numero}", f"U{numero:03d}")
+            for heure in range(9, 17):
+                try:
+                    codes.append(systeme.reserver_salle(self.s101, utilisateur, *self.creneau(heure, heure + 1)))
+                except ValueError:
+                    pass
+
+        fils = [threading.Thread(target=reserver, args=(n,)) for n in range(8)]
+        for fil in fils:
+            fil.start()
+        for fil in fils:
+            fil.join()
+
+        occupes = list(self.s101.creneaux_occupes(self.demain))
+        self.assertEqual(len(occupes), len(codes))
+        for (_, fin), (debut_suivant, _) in zip(occupes, occupes[1:]):
+            self.assertLess(fin, debut_suivant)
+
+    def test_stockage_sqlite_apres_redemarrage(self):
+        """
+        Test that bookings survive a restart through the SQLite store.
+        """
+        with tempfile.TemporaryDirectory() as dossier:
+            chemin = os.path.join(dossier, "reservations.db")
+            systeme = SystemeReservation(stockage=StockageSQLite(chemin))
+            systeme.ajouter_salle(self.s101)
+            code = systeme.reserver_salle(self.s101, self.marie, *self.creneau(10, 12))
+            annule = systeme.reserver_salle(self.s101, self.marie, *self.creneau(14, 15))
+            systeme.annuler_reservation(annule)
+            systeme.fermer()
+
+            stockage = StockageSQLite(chemin)
+            systeme = SystemeReservation(stockage=stockage)
+            salle = Salle("S101", 4)
+            systeme.ajouter_salle(salle)
+            self.assertFalse(salle.est_disponible_pour_creneau(*self.creneau(11, 13)))
+            self.assertTrue(salle.est_disponible_pour_creneau(*self.creneau(14, 15)))
+
+            reservations = systeme.get_reservations_salle("S101", self.demain)
+            self.assertEqual([r['code'] for r in reservations], [code])
+            self.assertEqual(reservations[0]['utilisateur'].identifiant, "MC001")
+            self.assertEqual(len(systeme.get_reservations_utilisateur(self.marie)), 1)
+            self.assertEqual(systeme.get_reservations_utilisateur(self.marie, fin=self.demain - datetime.timedelta(1)), [])
+            self.assertEqual(len(systeme.get_reservations_utilisateur(self.marie, self.demain, self.demain)), 1)
+
+            nouveau = systeme.reserver_salle(salle, self.marie, *self.creneau(14, 15))
+            self.assertNotIn(nouveau, (code, annule))
+            self.assertTrue(systeme.annuler_reservation(code))
+            self.assertEqual(len(systeme.get_planning(self.demain)["S101"]), 1)
+            stockage.fermer()
+
+    def test_fermer_ecrit_les_lots_en_attente(self):
+        """
+        Test that closing the system writes queued bookings, and that restarts reuse no code.
+        """
+        with tempfile.TemporaryDirectory() as dossier:
+            chemin = os.path.join(dossier, "reservations.db")
+            codes = set()
+            for heure in (10, 12, 14):
+                systeme = SystemeReservation(stockage=StockageSQLite(chemin, taille_lot=100))
+                salle = Salle("S101", 4)
+                systeme.ajouter_salle(salle)
+                codes.add(systeme.reserver_salle(salle, self.marie, *self.creneau(heure, heure + 1)))
+                systeme.fermer()
+
+            stockage = StockageSQLite(chemin)
+            self.assertEqual(len(stockage.reservations_salle("S101", self.demain)), 3)
+            self.assertEqual(len(codes), 3)
+            self.assertEqual(stockage.reserver_positions(1), 3 * GenerateurCodeStocke.TAILLE_BLOC)
+            stockage.fermer()
+
+    def test_purge_vers_archive(self):
+        """
+        Test that purging moves old bookings out of memory into the archive.
+        """
+        with tempfile.TemporaryDirectory() as dossier:
+            archive = ArchiveReservations(os.path.join(dossier, "archive.jsonl.gz"))
+            systeme = SystemeReservation(archive=archive)
+            systeme.ajouter_salle(self.s101)
+            apres_demain = self.demain + datetime.timedelta(days=1)
+            ancien = systeme.reserver_salle(self.s101, self.marie, *self.creneau(10, 12))
+            recent = systeme.reserver_salle(self.s101, self.marie, *self.creneau(10, 12, apres_demain))
+
+            self.assertEqual(systeme.purger(apres_demain), 1)
+            self.assertEqual(systeme.purger(apres_demain), 0)
+            self.assertFalse(systeme.reservation_existe(ancien))
+            self.assertTrue(self.s101.est_disponible(self.demain))
+            self.assertEqual(list(self.marie.reservations), [recent])
+
+            lignes = archive.reservations_salle("S101", self.demain)
+            self.assertEqual([ligne[0] for ligne in lignes], [ancien])
+            self.assertEqual(lignes[0][4], self.creneau(10, 12)[0])
+            codes = [r['code'] for r in systeme.get_reservations_utilisateur(self.marie)]
+            self.assertEqual(codes, [ancien, recent])
+
+    def test_purge_stockage_vers_archive(self):
+        """
+        Test that a purge only deletes stored bookings once the archive is written.
+        """
+        with tempfile.TemporaryDirectory() as dossier:
+            stockage = StockageSQLite(os.path.join(dossier, "reservations.db"), taille_lot=100)
+            archive = ArchiveReservations(os.path.join(dossier, "archives", "archive.jsonl.gz"))
+            systeme = SystemeReservation(stockage=stockage, archive=archive)
+            systeme.ajouter_salle(self.s101)
+            apres_demain = self.demain + datetime.timedelta(days=1)
+            ancien = systeme.reserver_salle(self.s101, self.marie, *self.creneau(10, 12))
+            recent = systeme.reserver_salle(self.s101, self.marie, *self.creneau(10, 12, apres_demain))
+
+            # Le dossier de l'archive n'existe pas : l'écriture échoue, rien n'est retiré
+            with self.assertRaises(OSError):
+                systeme.purger(apres_demain)
+            self.assertTrue(systeme.reservation_existe(ancien))
+            self.assertEqual(len(stockage.reservations_avant(apres_demain)), 1)
+
+            os.mkdir(os.path.join(dossier, "archives"))
+            self.assertEqual(systeme.purger(apres_demain), 1)
+            self.assertFalse(systeme.reservation_existe(ancien))
+            self.assertEqual(stockage.reservations_avant(apres_demain), [])
+            self.assertEqual([ligne[0] for ligne in archive.reservations_salle("S101", self.demain)], [ancien])
+            self.assertEqual(archive.limite, apres_demain)
+            codes = [r['code'] for r in systeme.get_reservations_utilisateur(self.marie)]
+            self.assertEqual(codes, [ancien, recent])
+
+            # Une période postérieure à la purge ne relit pas l'archive
+            with mock.patch.object(archive, "parcourir", side_effect=AssertionError):
+                codes = [r['code'] for r in systeme.get_reservations_utilisateur(self.marie, debut=apres_demain)]
+                self.assertEqual(codes, [recent])
+                self.assertEqual(len(systeme.get_reservations_salle("S101", apres_demain)), 1)
+            systeme.fermer()
+
+    def test_planifier_purge(self):
+        """
+        Test that a scheduled purge is triggered by a booking once it is due.
+        """
+        with tempfile.TemporaryDirectory() as dossier:
+            archive = ArchiveReservations(os.path.join(dossier, "archive.jsonl.gz"))
+            horloge = HorlogeFigee(datetime.datetime.combine(self.demain, datetime.time(8)))
+            systeme = SystemeReservation(archive=archive, horloge=horloge)
+            systeme.ajouter_salle(self.s101)
+            ancien = systeme.reserver_salle(self.s101, self.marie, *self.creneau(10, 11))
+            systeme.planifier_purge(datetime.timedelta(days=1))
+
+            horloge.avancer(datetime.timedelta(days=1))
+            systeme.reserver_salle(self.s101, self.marie, *self.creneau(10, 11, horloge.aujourdhui()))
+            self.assertTrue(systeme.reservation_existe(ancien))
+
+            horloge.avancer(datetime.timedelta(days=1))
+            systeme.reserver_salle(self.s101, self.marie, *self.creneau(10, 11, horloge.aujourdhui()))
+            self.assertFalse(systeme.reservation_existe(ancien))
+            self.assertEqual([ligne[0] for ligne in archive.parcourir()], [ancien])
+
+    def test_purge_garde_les_reservations_non_archivees(self):
+        """
+        Test that a booking made while the purge writes the archive stays in memory.
+        """
+        systeme = None
+
+        class ArchiveLente(ArchiveReservations):
+            """Archive during whose write another booking lands"""
+
+            def ajouter(self, lignes):
+                super().ajouter(lignes)
+                systeme.forcer_code_reservation(salle, utilisateur, "RES0TARDIVE")
+
+        with tempfile.TemporaryDirectory() as dossier:
+            archive = ArchiveLente(os.path.join(dossier, "archive.jsonl.gz"))
+            systeme = SystemeReservation(archive=archive)
+            salle, utilisateur = self.s101, self.marie
+            systeme.ajouter_salle(salle)
+            ancien = systeme.reserver_salle(salle, utilisateur, *self.creneau(14, 15))
+
+            self.assertEqual(systeme.purger(self.demain + datetime.timedelta(days=1)), 1)
+            self.assertEqual([ligne[0] for ligne in archive.parcourir()], [ancien])
+            self.assertFalse(systeme.reservation_existe(ancien))
+            self.assertTrue(systeme.reservation_existe("RES0TARDIVE"))
+            self.assertEqual(list(utilisateur.reservations), ["RES0TARDIVE"])
+            self.assertFalse(salle.est_disponible_pour_creneau(*self.creneau(9, 10)))
+
+    def test_purge_planifiee_concurrente(self):
+        """
+        Test that bookings racing past the scheduled purge date archive each old booking once.
+        """
+        class HorlogeLente(HorlogeFigee):
+            """Clock slow to answer, so that threads checking the purge date overlap"""
+
+            def maintenant(self):
+                time.sleep(0.01)
+                return super().maintenant()
+
+        with tempfile.TemporaryDirectory() as dossier:
+            archive = ArchiveReservations(os.path.join(dossier, "archive.jsonl.gz"))
+            horloge = HorlogeLente(datetime.datetime.combine(self.demain, datetime.time(8)))
+            systeme = SystemeReservation(concurrent=True, stockage=StockageSQLite(), archive=archive, horloge=horloge)
+            salles = [Salle(f"S{n}", 4) for n in range(4)]
+            for salle in salles:
+                systeme.ajouter_salle(salle)
+            ancien = systeme.reserver_salle(salles[0], self.marie, *self.creneau(10, 11))
+            systeme.planifier_purge(datetime.timedelta(days=0))
+            horloge.avancer(datetime.timedelta(days=1))
+
+            jour = horloge.aujourdhui()
+            fils = [threading.Thread(target=systeme.reserver_salle,
+                                     args=(salle, self.marie, *self.creneau(10, 11, jour))) for salle in salles]
+            for fil in fils:
+                fil.start()
+            for fil in fils:
+                fil.join()
+
+            self.assertEqual([ligne[0] for ligne in archive.parcourir()], [ancien])
+            systeme.fermer()
+
+    def test_reservations_utilisateur_par_periode(self):
+        """
+        Test the read-only view of a user's codes and the date-range filter.
+        """
+        jours = [self.demain + datetime.timedelta(days=n) for n in range(3)]
+        codes = [self.systeme.reserver_salle(self.s101, self.marie, *self.creneau(10, 11, jour)) for jour in jours]
+        self.assertEqual(list(self.marie.reservations), codes)
+        with self.assertRaises(AttributeError):
+            self.marie.reservations.add("RES0")
+
+        reservations = self.systeme.get_reservations_utilisateur(self.marie, debut=jours[1])
+        self.assertEqual([r['code'] for r in reservations], codes[1:])
+        reservations = self.systeme.get_reservations_utilisateur(self.marie, fin=jours[1])
+        self.assertEqual([r['code'] for r in reservations], codes[:2])
+
+        self.systeme.annuler_reservation(codes[1])
+        self.assertEqual(list(self.marie.reservations), [codes[0], codes[2]])
+
+    def test_horloge_injectee(self):
+        """
+        Test that the past is judged against the injected clock.
+        """
+        horloge = HorlogeFigee(datetime.datetime.combine(self.demain, datetime.time(10, 30)))
+        systeme = SystemeReservation(horloge=horloge)
+        systeme.ajouter_salle(self.s101)
+
+        with self.assertRaises(ValueError):
+            systeme.reserver_salle(self.s101, self.marie, *self.creneau(9, 10))
+        systeme.reserver_salle(self.s101, self.marie, *self.creneau(11, 12))
+        self.assertEqual(systeme.get_planning()["S101"][0]['debut'], self.creneau(11, 12)[0])
+
+        horloge.avancer(datetime.timedelta(hours=1))
+        with self.assertRaises(ValueError):
+            systeme.reserver_salle(self.s101, self.marie, *self.creneau(11, 12))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+import bisect
 import datetime
 
 
@@ -14,6 +15,11 @@ class Salle:
         self._code = code
         self._capacite = capacite
         self._reservations = {}  # date -> {heure_debut -> (heure_fin, utilisateur, code)}
+        # date -> liste triée des heures de début. La recherche d'un créneau y est
+        # en O(log n) ; insertion et retrait décalent la liste, en O(n), mais n est
+        # le nombre de créneaux d'une salle sur une seule journée.
+        self._debuts = {}
+        self._index_codes = {}  # code -> (date, heure_debut)
 
     @property
     def code(self):
@@ -40,12 +46,23 @@ class Salle:
         if date not in self._reservations:
             return True
 
-        for heure_debut_res, (heure_fin_res, _, _) in self._reservations[date].items():
-            # Vérifier si les créneaux se chevauchent
-            if (debut <= heure_fin_res and fin >= heure_debut_res):
-                return False
+        # Les créneaux d'une journée sont disjoints : seul le dernier créneau
+        # commençant avant la fin demandée peut chevaucher le créneau demandé.
+        debuts = self._debuts[date]
+        indice = bisect.bisect_right(debuts, fin)
+        if indice == 0:
+            return True
 
-        return True
+        heure_fin_res = self._reservations[date][debuts[indice - 1]][0]
+        return heure_fin_res < debut
+
+    def creneaux_occupes(self, date):
+        """
+        Parcourt les créneaux réservés d'une journée par heure de début croissante.
+        """
+        reservations = self._reservations.get(date, {})
+        for debut in self._debuts.get(date, ()):
+            yield debut, reservations[debut][0]
 
     def ajouter_reservation(self, debut, fin, utilisateur, code_reservation):
         """
@@ -54,40 +71,95 @@ class Salle:
         if not self.est_disponible_pour_creneau(debut, fin):
             raise ValueError("Créneau déjà occupé")
 
+        self._inserer_reservation(debut, fin, utilisateur, code_reservation)
+        return True
+
+    def _inserer_reservation(self, debut, fin, utilisateur, code_reservation):
+        """
+        Insère une réservation sans contrôle de disponibilité.
+        Un créneau commençant à la même heure est remplacé.
+        """
+        if code_reservation in self._index_codes:
+            self._retirer_reservation(*self._index_codes[code_reservation])
+
         date = debut.date()
         if date not in self._reservations:
             self._reservations[date] = {}
+            self._debuts[date] = []
 
-        self._reservations[date][debut] = (fin, utilisateur, code_reservation)
-        return True
+        reservations = self._reservations[date]
+        if debut in reservations:
+            del self._index_codes[reservations[debut][2]]
+        else:
+            bisect.insort(self._debuts[date], debut)  # O(n) : décale la fin de la liste
+        reservations[debut] = (fin, utilisateur, code_reservation)
+        self._index_codes[code_reservation] = (date, debut)
+
+    def _retirer_reservation(self, date, debut):
+        """
+        Retire le créneau commençant à l'heure donnée.
+        """
+        code = self._reservations[date].pop(debut)[2]
+        del self._index_codes[code]
+        if len(self._reservations[date]) == 0:
+            del self._reservations[date]
+            del self._debuts[date]
+        else:
+            debuts = self._debuts[date]
+            del debuts[bisect.bisect_left(debuts, debut)]
+
+    def reservations_avant(self, date):
+        """
+        Renvoie, sans les retirer, les tuples (code, debut, fin, utilisateur)
+        des réservations des jours antérieurs à une date.
+        """
+        return [(code, debut, fin, utilisateur)
+                for jour, creneaux in self._reservations.items() if jour < date
+                for debut, (fin, utilisateur, code) in creneaux.items()]
+
+    def purger_avant(self, date):
+        """
+        Retire les réservations des jours antérieurs à une date.
+        Renvoie la liste des tuples (code, debut, fin, utilisateur) retirés.
+        """
+        retirees = []
+        for jour in [jour for jour in self._reservations if jour < date]:
+            for debut, (fin, utilisateur, code) in self._reservations.pop(jour).items():
+                del self._index_codes[code]
+                retirees.append((code, debut, fin, utilisateur))
+            del self._debuts[jour]
+        return retirees
 
     def supprimer_reservation(self, code_reservation):
         """
         Supprime une réservation par son code.
         """
-        for date, reservations in list(self._reservations.items()):
-            for debut, (fin, utilisateur, code) in list(reservations.items()):
-                if code == code_reservation:
-                    del self._reservations[date][debut]
-                    if len(self._reservations[date]) == 0:
-                        del self._reservations[date]
-                    return True
+        if code_reservation not in self._index_codes:
+            return False
+
+        self._retirer_reservation(*self._index_codes[code_reservation])
+        return True
 
-        return False
+    def date_reservation(self, code_reservation):
+        """
+        Renvoie la date d'une réservation par son code, ou None.
+        """
+        creneau = self._index_codes.get(code_reservation)
+        return creneau[0] if creneau else None
 
     def trouver_reservation(self, code_reservation):
         """
         Trouve les détails d'une réservation par son code.
         """
-        for date, reservations in self._reservations.items():
-            for debut, (fin, utilisateur, code) in reservations.items():
-                if code == code_reservation:
-                    return {
-                        'date': date,
-                        'debut': debut,
-                        'fin': fin,
-                        'utilisateur': utilisateur,
-                        'code': code
-                    }
-
-        return None
\ No newline at end of file
+        if code_reservation not in self._index_codes:
+            return None
+
+        date, debut = self._index_codes[code_reservation]
+        fin, utilisateur, code = self._reservations[date][debut]
+        return {
+            'date': date,
+            'debut': debut,
+            'fin': fin,
+            'utilisateur': utilisateur,
+            'code': code
+        }
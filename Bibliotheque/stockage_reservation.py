@@ -0,0 +1,222 @@
+# stockage_reservation.py
+import abc
+import contextlib
+import datetime
+import itertools
+import random
+import sqlite3
+import threading
+
+
+class StockageReservations(abc.ABC):
+    """
+    Interface d'un stockage persistant des réservations.
+
+    Sans stockage, SystemeReservation conserve tout en mémoire. Un stockage
+    reçoit chaque écriture et répond aux consultations. Une ligne est un tuple
+    (code, code_salle, identifiant, nom, debut, fin).
+    """
+
+    @abc.abstractmethod
+    def graine_codes(self):
+        """Renvoie la graine des codes de réservation, fixée à la création du stockage."""
+
+    @abc.abstractmethod
+    def reserver_positions(self, nombre):
+        """
+        Réserve `nombre` positions du générateur de codes, jamais rendues
+        d'un démarrage à l'autre, et renvoie la première.
+        """
+
+    @abc.abstractmethod
+    def enregistrer(self, lignes):
+        """Enregistre (ou remplace) des réservations."""
+
+    @abc.abstractmethod
+    def supprimer(self, code):
+        """Supprime une réservation par son code."""
+
+    @abc.abstractmethod
+    def reservations_salle(self, code_salle, date):
+        """Lignes d'une salle pour une date, par heure de début croissante."""
+
+    @abc.abstractmethod
+    def reservations_salle_depuis(self, code_salle, date):
+        """Lignes d'une salle à partir d'une date, par heure de début croissante."""
+
+    @abc.abstractmethod
+    def reservations_date(self, date):
+        """Lignes de toutes les salles pour une date, par salle puis heure de début."""
+
+    @abc.abstractmethod
+    def reservations_utilisateur(self, identifiant, debut=None, fin=None):
+        """
+        Lignes d'un utilisateur, par heure de début croissante, limitées aux
+        dates comprises entre `debut` et `fin` (incluses) si elles sont données.
+        """
+
+    @abc.abstractmethod
+    def supprimer_lot(self, codes):
+        """Supprime des réservations par leurs codes, immédiatement."""
+
+    @abc.abstractmethod
+    def reservations_avant(self, date):
+        """Lignes antérieures à une date, par date, salle puis heure de début."""
+
+    def valider(self):
+        """Écrit les modifications en attente."""
+
+    def fermer(self):
+        """Valide les modifications en attente et libère le stockage."""
+        self.valider()
+
+
+class StockageSQLite(StockageReservations):
+    """
+    Stockage des réservations dans une base SQLite, indexée par salle, date,
+    heure de début, utilisateur et code.
+
+    Les écritures sont regroupées par lots de `taille_lot` opérations, chaque
+    lot étant écrit dans une seule transaction. Une consultation écrit d'abord
+    les opérations en attente.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS reservation (
+            code TEXT PRIMARY KEY,
+            salle TEXT NOT NULL,
+            utilisateur TEXT NOT NULL,
+            nom TEXT NOT NULL,
+            date TEXT NOT NULL,
+            debut TEXT NOT NULL,
+            fin TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS reservation_salle_date ON reservation (salle, date, debut);
+        CREATE INDEX IF NOT EXISTS reservation_date ON reservation (date, salle, debut);
+        CREATE INDEX IF NOT EXISTS reservation_utilisateur ON reservation (utilisateur, debut);
+        CREATE TABLE IF NOT EXISTS meta (
+            cle TEXT PRIMARY KEY,
+            valeur INTEGER NOT NULL
+        );
+    """
+
+    COLONNES = "code, salle, utilisateur, nom, debut, fin"
+
+    def __init__(self, chemin=":memory:", taille_lot=1):
+        """
+        Ouvre (ou crée) la base située à `chemin`.
+        """
+        self._taille_lot = taille_lot
+        self._en_attente = []  # opérations ('+', ligne) ou ('-', code)
+        self._verrou = threading.RLock()
+        self._connexion = sqlite3.connect(chemin, check_same_thread=False, isolation_level=None)
+        self._connexion.executescript(self.SCHEMA)
+
+    def graine_codes(self):
+        with self._verrou, self._transaction():
+            graine = self._meta("graine")
+            if graine is None:
+                graine = random.SystemRandom().getrandbits(63)
+                self._ecrire_meta("graine", graine)
+        return graine
+
+    def reserver_positions(self, nombre):
+        with self._verrou, self._transaction():
+            position = self._meta("position") or 0
+            self._ecrire_meta("position", position + nombre)
+        return position
+
+    def enregistrer(self, lignes):
+        with self._verrou:
+            self._en_attente.extend(('+', ligne) for ligne in lignes)
+            if len(self._en_attente) >= self._taille_lot:
+                self.valider()
+
+    def supprimer(self, code):
+        with self._verrou:
+            self._en_attente.append(('-', code))
+            if len(self._en_attente) >= self._taille_lot:
+                self.valider()
+
+    def reservations_salle(self, code_salle, date):
+        return self._lignes(f"SELECT {self.COLONNES} FROM reservation WHERE salle = ? AND date = ? ORDER BY debut",
+                            (code_salle, date.isoformat()))
+
+    def reservations_salle_depuis(self, code_salle, date):
+        return self._lignes(f"SELECT {self.COLONNES} FROM reservation WHERE salle = ? AND date >= ? "
+                            "ORDER BY date, debut", (code_salle, date.isoformat()))
+
+    def reservations_date(self, date):
+        return self._lignes(f"SELECT {self.COLONNES} FROM reservation WHERE date = ? ORDER BY salle, debut",
+                            (date.isoformat(),))
+
+    def reservations_utilisateur(self, identifiant, debut=None, fin=None):
+        requete = f"SELECT {self.COLONNES} FROM reservation WHERE utilisateur = ?"
+        parametres = [identifiant]
+        # Bornes exprimées sur l'heure de début pour profiter de l'index (utilisateur, debut)
+        if debut is not None:
+            requete += " AND debut >= ?"
+            parametres.append(debut.isoformat())
+        if fin is not None:
+            requete += " AND debut < ?"
+            parametres.append((fin + datetime.timedelta(days=1)).isoformat())
+        return self._lignes(requete + " ORDER BY debut", parametres)
+
+    def supprimer_lot(self, codes):
+        with self._verrou:
+            self._en_attente.extend(('-', code) for code in codes)
+            self.valider()
+
+    def reservations_avant(self, date):
+        return self._lignes(f"SELECT {self.COLONNES} FROM reservation WHERE date < ? ORDER BY date, salle, debut",
+                            (date.isoformat(),))
+
+    def valider(self):
+        with self._verrou:
+            if not self._en_attente:
+                return
+            operations, self._en_attente = self._en_attente, []
+            with self._transaction():
+                # Les opérations consécutives de même nature sont écrites ensemble
+                for nature, groupe in itertools.groupby(operations, key=lambda operation: operation[0]):
+                    if nature == '+':
+                        self._connexion.executemany(
+                            "INSERT OR REPLACE INTO reservation VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            [(code, salle, identifiant, nom, debut.date().isoformat(), debut.isoformat(),
+                              fin.isoformat()) for _, (code, salle, identifiant, nom, debut, fin) in groupe])
+                    else:
+                        self._connexion.executemany("DELETE FROM reservation WHERE code = ?",
+                                                    [(code,) for _, code in groupe])
+
+    def fermer(self):
+        with self._verrou:
+            self.valider()
+            self._connexion.close()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Exécute un bloc dans une transaction SQLite."""
+        self._connexion.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self._connexion.execute("ROLLBACK")
+            raise
+        self._connexion.execute("COMMIT")
+
+    def _meta(self, cle):
+        ligne = self._connexion.execute("SELECT valeur FROM meta WHERE cle = ?", (cle,)).fetchone()
+        return ligne[0] if ligne else None
+
+    def _ecrire_meta(self, cle, valeur):
+        self._connexion.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (cle, valeur))
+
+    def _lignes(self, requete, parametres):
+        """Exécute une consultation et convertit les dates des lignes obtenues."""
+        with self._verrou:
+            self.valider()
+            resultats = self._connexion.execute(requete, parametres).fetchall()
+        fromisoformat = datetime.datetime.fromisoformat
+        return [(code, salle, identifiant, nom, fromisoformat(debut), fromisoformat(fin))
+                for code, salle, identifiant, nom, debut, fin in resultats]
+
@@ -1,22 +1,86 @@
 # systeme_reservation.py
+import bisect
+import contextlib
 import datetime
-import random
-import string
+import itertools
+import threading
+
+from .generateur_code import GenerateurCodeReservation, GenerateurCodeStocke
+from .horloge import HORLOGE
+from .utilisateur import Utilisateur
+
+# Écart minimal entre deux créneaux : des créneaux qui se touchent se chevauchent
+_MARGE_CRENEAU = datetime.timedelta(minutes=1)
+
+# Contexte neutre utilisé à la place des verrous hors mode concurrent
+_SANS_VERROU = contextlib.nullcontext()
 
 
 class SystemeReservation:
     """Classe gérant les réservations de salles."""
 
-    def __init__(self):
+    def __init__(self, generateur_code=None, concurrent=False, stockage=None, archive=None, horloge=None):
+        """
+        Initialise le système. `generateur_code` est une fonction sans argument
+        renvoyant un nouveau code de réservation unique à chaque appel.
+
+        En mode `concurrent`, chaque salle a son propre verrou : les
+        réservations de salles différentes se font en parallèle, celles d'une
+        même salle sont sérialisées.
+
+        Avec un `stockage` (voir stockage_reservation), chaque écriture y est
+        reportée et les consultations y sont faites ; seules les réservations
+        à venir des salles ajoutées sont rechargées en mémoire.
+
+        Avec une `archive` (voir archive_reservation), les purges y déplacent
+        les réservations passées, et les consultations portant sur des dates
+        purgées y sont faites.
+
+        `horloge` (voir horloge) fournit la date et l'heure courantes.
+        """
+        self._horloge = horloge or HORLOGE
+        self._stockage = stockage
+        self._archive = archive
+        self._conservation = None  # durée de conservation pour la purge planifiée
+        self._intervalle_purge = None
+        self._prochaine_purge = None
+        if generateur_code is None and stockage is not None:
+            # Même graine à chaque démarrage, positions réservées dans le stockage : pas de code réutilisé
+            generateur_code = GenerateurCodeStocke(stockage)
+        self._generateur_code = generateur_code or GenerateurCodeReservation()
+        self._utilisateurs = {}  # identifiant -> Utilisateur (relus du stockage ou de l'archive)
+        self._concurrent = concurrent
+        self._verrous = {}  # code_salle -> verrou (mode concurrent uniquement)
+        # Sérialise les purges et le déclenchement de la purge planifiée (mode concurrent uniquement)
+        self._verrou_purge = threading.RLock() if concurrent else _SANS_VERROU
         self._salles = {}  # code_salle -> objet Salle
         self._reservations = {}  # code_reservation -> (salle, utilisateur)
+        self._codes_par_salle_date = {}  # (code_salle, date) -> {code_reservation: None}
+        self._salles_par_capacite = []  # liste triée de (capacite, code_salle)
         self._heures_ouverture = (9, 18)  # (heure_debut, heure_fin)
 
+    def fermer(self):
+        """Écrit les réservations encore en attente dans le stockage et le ferme."""
+        if self._stockage is not None:
+            self._stockage.fermer()
+
     def ajouter_salle(self, salle):
         """Ajoute une salle au système."""
         if salle.code in self._salles:
             raise ValueError(f"Une salle avec le code {salle.code} existe déjà")
+        if self._concurrent:
+            self._verrous[salle.code] = threading.Lock()
         self._salles[salle.code] = salle
+        bisect.insort(self._salles_par_capacite, (salle.capacite, salle.code))
+
+        if self._stockage is not None:
+            # Recharger les réservations à venir de la salle
+            aujourd_hui = self._horloge.aujourdhui()
+            for code, _, identifiant, nom, debut, fin in self._stockage.reservations_salle_depuis(salle.code,
+                                                                                                  aujourd_hui):
+                utilisateur = self._utilisateur(identifiant, nom)
+                salle._inserer_reservation(debut, fin, utilisateur, code)
+                self._enregistrer_reservation(code, salle, utilisateur, debut.date())
 
     def set_heures_ouverture(self, heure_debut, heure_fin):
         """Définit les heures d'ouverture."""
@@ -24,13 +88,13 @@ class SystemeReservation:
             raise ValueError("L'heure de début doit être antérieure à l'heure de fin")
         self._heures_ouverture = (heure_debut, heure_fin)
 
-    def _generer_code_reservation(self, longueur=8):
-        """Génère un code de réservation aléatoire."""
-        caracteres = string.ascii_uppercase + string.digits
-        code = 'RES' + ''.join(random.choice(caracteres) for _ in range(longueur))
-        return code
+    def _verrou(self, salle):
+        """Renvoie le verrou d'une salle, ou un contexte neutre hors mode concurrent."""
+        if self._concurrent:
+            return self._verrous[salle.code]
+        return _SANS_VERROU
 
-    def _valider_creneau(self, debut, fin):
+    def _valider_creneau(self, debut, fin, maintenant=None):
         """Valide qu'un créneau horaire est acceptable."""
         # Vérifier que début et fin sont le même jour
         if debut.date() != fin.date():
@@ -46,7 +110,7 @@ class SystemeReservation:
             raise ValueError("La durée minimale de réservation est de 30 minutes")
 
         # Vérifier que la réservation n'est pas dans le passé
-        if debut < datetime.datetime.now():
+        if debut < (maintenant or self._horloge.maintenant()):
             raise ValueError("Impossible de réserver dans le passé")
 
     def reserver_salle(self, salle, utilisateur, debut, fin):
@@ -57,53 +121,307 @@ class SystemeReservation:
 
         # Valider le créneau horaire
         self._valider_creneau(debut, fin)
+        self._purger_si_echue()
+
+        with self._verrou(salle):
+            # Vérifier la disponibilité
+            if not salle.est_disponible_pour_creneau(debut, fin):
+                raise ValueError("Créneau déjà occupé")
+
+            # Générer un code de réservation unique
+            code = self._nouveau_code()
+
+            # Ajouter la réservation
+            if self._stockage is not None:
+                self._stockage.enregistrer([self._ligne(code, salle, utilisateur, debut, fin)])
+            salle.ajouter_reservation(debut, fin, utilisateur, code)
+            self._enregistrer_reservation(code, salle, utilisateur, debut.date())
+
+        return code
+
+    def reserver_salles_en_masse(self, demandes):
+        """
+        Réserve un lot de créneaux, chaque demande étant un tuple
+        (salle, utilisateur, debut, fin).
 
-        # Vérifier la disponibilité
-        if not salle.est_disponible_pour_creneau(debut, fin):
-            raise ValueError("Créneau déjà occupé")
+        Le lot est entièrement validé avant toute écriture : si une demande
+        est refusée, aucune réservation n'est enregistrée. Renvoie les codes
+        de réservation dans l'ordre des demandes.
+        """
+        demandes = list(demandes)
+        self._purger_si_echue()
+
+        # Valider chaque demande et regrouper par salle et par jour
+        maintenant = self._horloge.maintenant()
+        groupes = {}
+        for indice, (salle, utilisateur, debut, fin) in enumerate(demandes):
+            if salle.code not in self._salles:
+                raise ValueError(f"Salle {salle.code} inconnue")
+            self._valider_creneau(debut, fin, maintenant)
+            groupes.setdefault((salle.code, debut.date()), []).append(indice)
+
+        with contextlib.ExitStack() as verrous:
+            # Verrouiller les salles concernées, toujours dans le même ordre
+            for code_salle in sorted({code_salle for code_salle, _ in groupes}):
+                verrous.enter_context(self._verrou(self._salles[code_salle]))
+
+            # Balayage trié de chaque groupe : conflits internes au lot et avec l'existant
+            for indices in groupes.values():
+                indices.sort(key=lambda i: demandes[i][2])
+                fin_precedente = None
+                for indice in indices:
+                    salle, _, debut, fin = demandes[indice]
+                    if fin_precedente is not None and debut <= fin_precedente:
+                        raise ValueError(f"Créneaux en conflit dans le lot pour la salle {salle.code}")
+                    if not salle.est_disponible_pour_creneau(debut, fin):
+                        raise ValueError("Créneau déjà occupé")
+                    fin_precedente = fin
+
+            # Enregistrer le lot, désormais sans conflit
+            codes = [self._nouveau_code() for _ in demandes]
+            if self._stockage is not None:
+                self._stockage.enregistrer([self._ligne(code, *demande) for code, demande in zip(codes, demandes)])
+            for code, (salle, utilisateur, debut, fin) in zip(codes, demandes):
+                salle._inserer_reservation(debut, fin, utilisateur, code)
+                self._enregistrer_reservation(code, salle, utilisateur, debut.date())
+
+        return codes
+
+    def chercher_creneaux_libres(self, duree, date, capacite_min=0, fenetre=None, nombre=None):
+        """
+        Cherche des créneaux libres d'une durée donnée pour une date.
+
+        Les salles sont parcourues par capacité croissante à partir de
+        `capacite_min`; pour chacune, le premier créneau de chaque intervalle
+        libre assez long est proposé. `fenetre` est un tuple (heure_debut,
+        heure_fin) restreignant les heures d'ouverture. Les résultats sont
+        produits à la demande, au plus `nombre` s'il est précisé.
+        """
+        creneaux = self._creneaux_libres(duree, date, capacite_min, fenetre)
+        if nombre is not None:
+            creneaux = itertools.islice(creneaux, nombre)
+        return creneaux
 
-        # Générer un code de réservation unique
-        code = self._generer_code_reservation()
+    def _creneaux_libres(self, duree, date, capacite_min, fenetre):
+        """Générateur des créneaux libres, salle par salle."""
+        heure_debut, heure_fin = self._heures_ouverture
+        if fenetre is not None:
+            heure_debut = max(heure_debut, fenetre[0])
+            heure_fin = min(heure_fin, fenetre[1])
+
+        ouverture = datetime.datetime.combine(date, datetime.time(heure_debut))
+        fermeture = datetime.datetime.combine(date, datetime.time(0)) + datetime.timedelta(hours=heure_fin)
+        maintenant = self._horloge.maintenant()
+        if maintenant > ouverture:
+            # Pas de créneau dans le passé : partir de la minute suivante
+            ouverture = maintenant.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+
+        premiere = bisect.bisect_left(self._salles_par_capacite, (capacite_min,))
+        for _, code_salle in self._salles_par_capacite[premiere:]:
+            salle = self._salles[code_salle]
+            with self._verrou(salle):
+                occupes = list(salle.creneaux_occupes(date))
+
+            curseur = ouverture
+            for debut_res, fin_res in occupes:
+                if min(debut_res - _MARGE_CRENEAU, fermeture) - curseur >= duree:
+                    yield {'salle': salle, 'debut': curseur, 'fin': curseur + duree}
+                curseur = max(curseur, fin_res + _MARGE_CRENEAU)
+                if fermeture - curseur < duree:
+                    break
+            else:
+                if fermeture - curseur >= duree:
+                    yield {'salle': salle, 'debut': curseur, 'fin': curseur + duree}
+
+    def _nouveau_code(self):
+        """
+        Code de réservation pas encore attribué. Le générateur ne répète pas
+        ses codes, mais un code forcé ou rechargé du stockage peut coïncider.
+        """
+        code = self._generateur_code()
         while code in self._reservations:
-            code = self._generer_code_reservation()
+            code = self._generateur_code()
+        return code
+
+    def _ligne(self, code, salle, utilisateur, debut, fin):
+        """Ligne de stockage d'une réservation."""
+        return (code, salle.code, utilisateur.identifiant, utilisateur.nom, debut, fin)
 
-        # Ajouter la réservation
-        salle.ajouter_reservation(debut, fin, utilisateur, code)
+    def _utilisateur(self, identifiant, nom):
+        """Utilisateur connu du système pour un identifiant, créé au besoin."""
+        utilisateur = self._utilisateurs.get(identifiant)
+        if utilisateur is None:
+            utilisateur = self._utilisateurs[identifiant] = Utilisateur(nom, identifiant)
+        return utilisateur
+
+    def _details(self, ligne, utilisateur=None):
+        """Détails d'une réservation à partir d'une ligne de stockage."""
+        code, _, identifiant, nom, debut, fin = ligne
+        return {
+            'date': debut.date(),
+            'debut': debut,
+            'fin': fin,
+            'utilisateur': utilisateur or self._utilisateur(identifiant, nom),
+            'code': code
+        }
+
+    def _enregistrer_reservation(self, code, salle, utilisateur, date):
+        """Enregistre une réservation dans le système et ses index."""
+        if self._stockage is not None:
+            self._utilisateurs.setdefault(utilisateur.identifiant, utilisateur)
         self._reservations[code] = (salle, utilisateur)
+        self._codes_par_salle_date.setdefault((salle.code, date), {})[code] = None
         utilisateur.ajouter_reservation(code)
 
-        return code
+    def _desindexer_reservation(self, code, salle, date):
+        """Retire une réservation de l'index par salle et par date."""
+        cle = (salle.code, date)
+        codes = self._codes_par_salle_date.get(cle)
+        if codes is not None and code in codes:
+            del codes[code]
+            if len(codes) == 0:
+                del self._codes_par_salle_date[cle]
 
     def annuler_reservation(self, code_reservation):
         """Annule une réservation par son code."""
-        if code_reservation not in self._reservations:
+        reservation = self._reservations.get(code_reservation)
+        if reservation is None:
             raise ValueError(f"Réservation {code_reservation} inconnue")
 
-        salle, utilisateur = self._reservations[code_reservation]
+        salle, utilisateur = reservation
+        with self._verrou(salle):
+            details = salle.trouver_reservation(code_reservation)
+            if details is None:
+                return False
 
-        # Supprimer la réservation de la salle
-        if salle.supprimer_reservation(code_reservation):
+            if self._stockage is not None:
+                self._stockage.supprimer(code_reservation)
+
+            # Supprimer la réservation de la salle
+            salle.supprimer_reservation(code_reservation)
+            self._desindexer_reservation(code_reservation, salle, details['date'])
             # Supprimer la réservation de l'utilisateur
             utilisateur.supprimer_reservation(code_reservation)
             # Supprimer la réservation du système
             del self._reservations[code_reservation]
             return True
 
-        return False
+    def purger(self, avant=None):
+        """
+        Retire de la mémoire les réservations des jours antérieurs à `avant`
+        (aujourd'hui par défaut) et renvoie leur nombre.
+
+        Avec une archive, elles y sont déplacées, y compris celles du
+        stockage : elles ne sont retirées qu'une fois l'archive écrite sur
+        disque. Sans archive, le stockage les conserve ; sans l'un ni
+        l'autre, elles sont abandonnées.
+        """
+        if avant is None:
+            avant = self._horloge.aujourdhui()
+
+        with self._verrou_purge:
+            return self._purger(avant)
+
+    def _purger(self, avant):
+        """Purge proprement dite, sous le verrou des purges."""
+        if self._archive is None:
+            nombre = 0
+            for salle in list(self._salles.values()):
+                with self._verrou(salle):
+                    for code, debut, _, utilisateur in salle.purger_avant(avant):
+                        self._oublier_reservation(code, salle, utilisateur, debut.date())
+                        nombre += 1
+            return nombre
+
+        if self._stockage is not None:
+            # Le stockage contient aussi les réservations jamais rechargées en mémoire
+            lignes = self._stockage.reservations_avant(avant)
+        else:
+            lignes = []
+            for salle in list(self._salles.values()):
+                with self._verrou(salle):
+                    lignes.extend(self._ligne(code, salle, utilisateur, debut, fin)
+                                  for code, debut, fin, utilisateur in salle.reservations_avant(avant))
+        self._archive.ajouter(lignes)
+        if self._stockage is not None:
+            self._stockage.supprimer_lot([ligne[0] for ligne in lignes])
+
+        # Ne retirer de la mémoire que ce qui a été archivé : une réservation
+        # ajoutée depuis la lecture attend la purge suivante
+        codes_par_salle = {}
+        for code, code_salle, _, _, debut, _ in lignes:
+            codes_par_salle.setdefault(code_salle, []).append((code, debut.date()))
+        for code_salle, codes in codes_par_salle.items():
+            salle = self._salles.get(code_salle)
+            if salle is None:
+                continue
+            with self._verrou(salle):
+                for code, date in codes:
+                    reservation = self._reservations.get(code)
+                    if reservation is not None and salle.supprimer_reservation(code):
+                        self._oublier_reservation(code, salle, reservation[1], date)
+        return len(lignes)
+
+    def _oublier_reservation(self, code, salle, utilisateur, date):
+        """Retire des index et de l'utilisateur une réservation déjà retirée de sa salle."""
+        self._desindexer_reservation(code, salle, date)
+        utilisateur.supprimer_reservation(code)
+        self._reservations.pop(code, None)
+
+    def planifier_purge(self, conservation, intervalle=datetime.timedelta(days=1)):
+        """
+        Planifie une purge des réservations plus anciennes que `conservation`
+        (un timedelta), déclenchée par les réservations au plus une fois par
+        `intervalle`.
+        """
+        self._conservation = conservation
+        self._intervalle_purge = intervalle
+        self._prochaine_purge = self._horloge.maintenant()
+
+    def _purger_si_echue(self):
+        """Lance la purge planifiée si son échéance est passée, une seule fois même en mode concurrent."""
+        if self._prochaine_purge is None:
+            return
+        with self._verrou_purge:
+            if self._horloge.maintenant() < self._prochaine_purge:
+                return
+            self._prochaine_purge = self._horloge.maintenant() + self._intervalle_purge
+            self._purger(self._horloge.aujourdhui() - self._conservation)
+
+    def _archivee(self, date):
+        """Indique si des réservations d'une date peuvent se trouver dans l'archive."""
+        return self._archive is not None and self._archive.limite is not None and date < self._archive.limite
 
     def reservation_existe(self, code_reservation):
         """Vérifie si une réservation existe."""
         return code_reservation in self._reservations
 
-    def get_reservations_utilisateur(self, utilisateur):
-        """Récupère toutes les réservations d'un utilisateur."""
+    def get_reservations_utilisateur(self, utilisateur, debut=None, fin=None):
+        """
+        Récupère les réservations d'un utilisateur, éventuellement limitées
+        aux dates comprises entre `debut` et `fin` (incluses).
+        """
         reservations = []
-        for code in utilisateur.reservations:
-            if code in self._reservations and self._reservations[code][1] == utilisateur:
-                salle = self._reservations[code][0]
-                details = salle.trouver_reservation(code)
-                if details:
-                    reservations.append(details)
+        if self._archivee(debut or datetime.date.min):
+            reservations = [self._details(ligne, utilisateur) for ligne
+                            in self._archive.reservations_utilisateur(utilisateur.identifiant, debut, fin)]
+
+        if self._stockage is not None:
+            return reservations + [self._details(ligne, utilisateur) for ligne
+                                   in self._stockage.reservations_utilisateur(utilisateur.identifiant, debut, fin)]
+
+        # En mode concurrent, l'utilisateur peut réserver pendant le parcours
+        codes = list(utilisateur.reservations) if self._concurrent else utilisateur.reservations
+        for code in codes:
+            reservation = self._reservations.get(code)
+            if reservation is None or reservation[1] != utilisateur:
+                continue
+            salle = reservation[0]
+            with self._verrou(salle):
+                date = salle.date_reservation(code)
+                if date is None or (debut is not None and date < debut) or (fin is not None and date > fin):
+                    continue
+                reservations.append(salle.trouver_reservation(code))
         return reservations
 
     def get_reservations_salle(self, code_salle, date=None):
@@ -111,17 +429,48 @@ class SystemeReservation:
         if code_salle not in self._salles:
             raise ValueError(f"Salle {code_salle} inconnue")
 
-        salle = self._salles[code_salle]
-
         # Si aucune date n'est spécifiée, utiliser la date d'aujourd'hui
         if date is None:
-            date = datetime.date.today()
+            date = self._horloge.aujourdhui()
 
         reservations = []
-        for code, (s, utilisateur) in self._reservations.items():
-            if s == salle:
+        if self._archivee(date):
+            reservations = [self._details(ligne) for ligne in self._archive.reservations_salle(code_salle, date)]
+
+        if self._stockage is not None:
+            return reservations + [self._details(ligne)
+                                   for ligne in self._stockage.reservations_salle(code_salle, date)]
+
+        return reservations + self._reservations_salle_date(self._salles[code_salle], date)
+
+    def get_planning(self, date=None):
+        """Récupère les réservations de toutes les salles pour une date donnée."""
+        if date is None:
+            date = self._horloge.aujourdhui()
+
+        if self._stockage is not None:
+            planning = {code_salle: [] for code_salle in self._salles}
+            for ligne in self._stockage.reservations_date(date):
+                if ligne[1] in planning:
+                    planning[ligne[1]].append(self._details(ligne))
+        else:
+            planning = {code_salle: self._reservations_salle_date(salle, date)
+                        for code_salle, salle in self._salles.items()}
+
+        if self._archivee(date):
+            for ligne in self._archive.reservations_date(date):
+                if ligne[1] in planning:
+                    planning[ligne[1]].append(self._details(ligne))
+
+        return planning
+
+    def _reservations_salle_date(self, salle, date):
+        """Détails des réservations d'une salle pour une date, via l'index."""
+        reservations = []
+        with self._verrou(salle):
+            for code in self._codes_par_salle_date.get((salle.code, date), ()):
                 details = salle.trouver_reservation(code)
-                if details and details['date'] == date:
+                if details:
                     reservations.append(details)
 
         return reservations
@@ -132,15 +481,14 @@ class SystemeReservation:
         """
         # On suppose que cette méthode n'est utilisée que dans un contexte de test
         # et qu'elle simule une réservation existante
-        self._reservations[code] = (salle, utilisateur)
-        utilisateur.ajouter_reservation(code)
-
-        # On simule également une entrée dans la salle
-        demain = datetime.date.today() + datetime.timedelta(days=1)
-        debut = datetime.datetime.combine(demain, datetime.time(9, 0))
-        fin = datetime.datetime.combine(demain, datetime.time(11, 0))
+        demain = self._horloge.aujourdhui() + datetime.timedelta(days=1)
+        with self._verrou(salle):
+            self._enregistrer_reservation(code, salle, utilisateur, demain)
 
-        if demain not in salle._reservations:
-            salle._reservations[demain] = {}
+            # On simule également une entrée dans la salle
+            debut = datetime.datetime.combine(demain, datetime.time(9, 0))
+            fin = datetime.datetime.combine(demain, datetime.time(11, 0))
 
-        salle._reservations[demain][debut] = (fin, utilisateur, code)
\ No newline at end of file
+            if self._stockage is not None:
+                self._stockage.enregistrer([self._ligne(code, salle, utilisateur, debut, fin)])
+            salle._inserer_reservation(debut, fin, utilisateur, code)
\ No newline at end of file
@@ -5,7 +5,7 @@ class Utilisateur:
     def __init__(self, nom, identifiant):
         self._nom = nom
         self._identifiant = identifiant
-        self._reservations = []  # Liste des codes de réservation
+        self._reservations = {}  # Codes de réservation, dans l'ordre d'ajout
 
     @property
     def nom(self):
@@ -17,13 +17,14 @@ class Utilisateur:
 
     @property
     def reservations(self):
-        return self._reservations.copy()
+        """Vue en lecture seule des codes de réservation, sans copie."""
+        return self._reservations.keys()
 
     def ajouter_reservation(self, code_reservation):
-        self._reservations.append(code_reservation)
+        self._reservations[code_reservation] = None
 
     def supprimer_reservation(self, code_reservation):
         if code_reservation in self._reservations:
-            self._reservations.remove(code_reservation)
+            del self._reservations[code_reservation]
             return True
-        return False
\ No newline at end of file
+        return False
@@ -1,4 +1,5 @@
 from ObserverPattern.delivery_observer import DeliveryObserver, BookInfo
+from SpaceShip.spaceship_model import TravelResult
 
 
 class Spaceship(DeliveryObserver):
@@ -13,6 +14,7 @@ class Spaceship(DeliveryObserver):
             capacity: Maximum book carrying capacity
         """
         self.name = name
+        self._fuel_listeners = ()  # replaced, never mutated, so listeners may unsubscribe while notified
         self.fuel_level = fuel_level
         self.capacity = capacity
         self.pilot = None
@@ -21,6 +23,33 @@ class Spaceship(DeliveryObserver):
         self.mission_history = []
         self.received_alerts = []  # Stocker les alertes reçues
 
+    @property
+    def fuel_level(self) -> int:
+        return self._fuel_level
+
+    @fuel_level.setter
+    def fuel_level(self, fuel_level: int) -> None:
+        self._fuel_level = fuel_level
+        for listener in self._fuel_listeners:
+            listener(self)
+
+    def add_fuel_listener(self, listener) -> None:
+        """Register a function called with the spaceship whenever its fuel level changes
+
+        Args:
+            listener: The function to call
+        """
+        self._fuel_listeners += (listener,)
+
+    def remove_fuel_listener(self, listener) -> None:
+        """Unregister a function registered with add_fuel_listener
+
+        Args:
+            listener: The function to remove
+        """
+        listeners = list(self._fuel_listeners)
+        listeners.remove(listener)
+        self._fuel_listeners = tuple(listeners)
 
     def assign_pilot(self, pilot: 'Pilot') -> None:
         """Assign a pilot to the spaceship with bidirectional relationship
@@ -148,6 +177,20 @@ class Spaceship(DeliveryObserver):
                 f"{pilot_info}\n"
                 f"{mission_info}")
 
+    def travel_result(self, fuel_used: int) -> TravelResult:
+        """Simulate traveling and using fuel, without building a message
+
+        Args:
+            fuel_used: Amount of fuel to use
+
+        Returns:
+            Whether the spaceship traveled, and its remaining fuel
+        """
+        if self.fuel_level >= fuel_used:
+            self.fuel_level -= fuel_used
+            return TravelResult(True, self.fuel_level)
+        return TravelResult(False, self.fuel_level)
+
     def travel(self, fuel_used: int) -> str:
         """Simulate traveling and using fuel (compatibility with original code)
 
@@ -157,8 +200,7 @@ class Spaceship(DeliveryObserver):
         Returns:
             A message about the travel result
         """
-        if self.fuel_level >= fuel_used:
-            self.fuel_level -= fuel_used
+        if self.travel_result(fuel_used).success:
             return f"The spaceship {self.name} has traveled! Remaining fuel: {self.fuel_level} units."
         return "Insufficient fuel for travel!"
 
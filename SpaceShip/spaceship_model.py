@@ -5,21 +5,54 @@ if typing.TYPE_CHECKING:
     from pilot_model import Pilot
 
 
+class TravelResult(typing.NamedTuple):
+    """Résultat d'un voyage : réussite et carburant restant."""
+    success: bool
+    fuel_level: int
+
+
 class Spaceship:
     def __init__(self, name: str, fuel_level: int):
         self.name = name
+        self._fuel_listeners = ()  # remplacé, jamais modifié : retirer pendant une notification est sans risque
         self.fuel_level = fuel_level
         self.pilot = None
 
+    @property
+    def fuel_level(self) -> int:
+        return self._fuel_level
+
+    @fuel_level.setter
+    def fuel_level(self, fuel_level: int):
+        self._fuel_level = fuel_level
+        for listener in self._fuel_listeners:
+            listener(self)
+
+    def add_fuel_listener(self, listener):
+        """Enregistre une fonction appelée avec le vaisseau à chaque changement de carburant."""
+        self._fuel_listeners += (listener,)
+
+    def remove_fuel_listener(self, listener):
+        """Retire une fonction enregistrée par add_fuel_listener."""
+        listeners = list(self._fuel_listeners)
+        listeners.remove(listener)
+        self._fuel_listeners = tuple(listeners)
+
     def assign_pilot(self, pilot: "Pilot"):
         """Assigne un pilote au vaisseau."""
         self.pilot = pilot
         pilot.assign_spaceship(self)
 
-    def travel(self, fuel_used: int) -> str:
-        """Simule un voyage si le carburant est suffisant."""
+    def travel_result(self, fuel_used: int) -> TravelResult:
+        """Simule un voyage si le carburant est suffisant, sans construire de message."""
         if self.fuel_level >= fuel_used:
             self.fuel_level -= fuel_used
+            return TravelResult(True, self.fuel_level)
+        return TravelResult(False, self.fuel_level)
+
+    def travel(self, fuel_used: int) -> str:
+        """Simule un voyage si le carburant est suffisant."""
+        if self.travel_result(fuel_used).success:
             return f"Le vaisseau {self.name} a voyagé ! Il reste {self.fuel_level} unités de carburant."
         return "Carburant insuffisant pour voyager !"
 
@@ -1,4 +1,4 @@
-from .spaceship_model import Spaceship
+from .spaceship_model import Spaceship, TravelResult
 from .pilot_model import Pilot
 import unittest
 
@@ -22,6 +22,12 @@ class TestSpaceship(unittest.TestCase):
         result = self.spaceship.travel(120)
         self.assertEqual(result, "Carburant insuffisant pour voyager !")
 
+    def test_travel_result(self):
+        """Test le résultat structuré d'un voyage, réussi puis refusé."""
+        self.assertEqual(self.spaceship.travel_result(30), TravelResult(True, 70))
+        self.assertEqual(self.spaceship.travel_result(120), TravelResult(False, 70))
+        self.assertEqual(self.spaceship.fuel_level, 70)
+
 
 if __name__ == "__main__":
     unittest.main()